@@ -4,33 +4,105 @@ Each tool is decorated with @tool and can be called by the LLM when needed.
 Supports multi-chain wallet connections via HOT Kit.
 """
 import asyncio
-from typing import Optional, Dict, Any
+import logging
+import sys
+from contextvars import ContextVar
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Optional, Dict, Any, FrozenSet, Mapping, Tuple
 from langchain_core.tools import tool
 
-from tools import get_swap_quote as _get_swap_quote, get_available_tokens, create_near_intent_transaction
-from validators import fuzzy_match_token, validate_near_address, validate_evm_address, validate_address_for_chain, get_chain_address_format
+import knowledge_base
+from tools import aget_swap_quote as _aget_swap_quote, get_available_tokens, create_near_intent_transaction, create_deposit_transaction, get_sign_action_type, is_evm_chain, EVM_CHAINS
+from database import get_pending_quote, save_pending_quote
+from validators import fuzzy_match_token, validate_near_address, validate_evm_address, validate_address_for_chain, get_chain_address_format, EVM_ADDRESS_RE
 from knowledge_base import (
     get_available_tokens_from_api, 
     get_token_symbols_list, 
     format_token_list_for_display,
-    format_tokens_with_chain_prefix,
-    get_token_by_symbol
+    get_token_page,
+    get_token_by_symbol,
+    get_tokens_by_symbol,
+    get_token_best_match,
 )
 
+logger = logging.getLogger(__name__)
+
+# account_id values meaning no wallet is connected
+_NOT_CONNECTED_SENTINELS = frozenset({"Not connected", "", None})
+
+# Static responses (built once at import)
+_MSG_WALLET_NOT_CONNECTED = (
+    "  **Wallet Not Connected**\n\n"
+    "Please connect your wallet using the Connect button first. "
+    "You can connect wallets from any chain   NEAR, Ethereum, Solana, Tron, and more."
+)
+_MSG_TOKENS_NOT_LOADED = "  Token data not loaded yet. Please try again."
+_MSG_NO_RECENT_QUOTE = "  No recent quote found. Please get a quote first by asking for a swap."
+_MSG_QUOTE_HEADER = "  **Swap Quote**"
+_MSG_QUOTE_INSTRUCTIONS = "Present this quote to the user. Ask them to reply 'yes' or 'confirm' to proceed, or 'no' to cancel."
+_MSG_TOKEN_NOT_FOUND = "  Token '{}' not found. Use get_available_tokens_tool to see available tokens."
+_MSG_NO_STRATEGIES = (
+    "You don't have any active strategies yet. Would you like me to set one up? I can help with:\n\n"
+    "  **Price Alert**   Alert when a token drops or surges past a threshold\n"
+    "  **Stop Loss**   Auto-sell when a token drops dangerously\n"
+    "  **Portfolio Rebalance**   Keep your portfolio balanced\n\n"
+    "Just tell me what you'd like!"
+)
+_MSG_NO_SETTINGS_CHANGED = (
+    "No settings were changed. Tell me what you'd like to update:\n"
+    "  Autonomy level (Off / Notify / Auto)\n"
+    "  Max per transaction\n"
+    "  Daily spending limit\n"
+    "  Kill switch (on/off)"
+)
+_MSG_AUTONOMY_NOT_SET_UP = (
+    "You haven't set up autonomy yet. Would you like me to help? I can configure:\n"
+    "  Your autonomy level (Off / Notify / Auto)\n"
+    "  Spending limits and guardrails\n"
+    "  Trading strategies (price alerts, stop-loss, rebalancing)"
+)
+_MSG_HOT_PAY_COMING_SOON = (
+    "  **Feature In Progress**\n\n"
+    "HOT Pay integration (Payment Links & Merchant Tracking) is currently being developed.\n"
+    "I know about these features, but I can't execute them just yet!\n\n"
+    "Current capabilities:\n"
+    "  Token Swaps\n"
+    "  Balance Checks\n"
+    "  Cross-Chain Bridge\n"
+    "  Merchant Payments (Coming Soon)"
+)
+
+# Chat session the current request belongs to (set by agents.process_message).
+# Quotes are stored per session so concurrent users never share one.
+# NO_SESSION_ID marks callers without a chat session.
+NO_SESSION_ID = "local"
+current_session_id: ContextVar[str] = ContextVar("current_session_id", default=NO_SESSION_ID)
+QUOTE_TTL = 300  # seconds   matches the 5 minute 1-Click quote deadline
+
+
+async def get_last_quote() -> Optional[Dict[str, Any]]:
+    """Get the most recent unexpired quote for the current chat session."""
+    # sqlite3 blocks, so the lookup runs in a worker thread
+    return await asyncio.to_thread(get_pending_quote, current_session_id.get(), QUOTE_TTL)
+
 
 @tool
-async def get_available_tokens_tool() -> str:
+async def get_available_tokens_tool(page: int = 1) -> str:
     """
     Get the FULL list of ALL available tokens that can be swapped.
     Only use this when user wants to see ALL tokens, not a specific one.
     DO NOT use this when user asks about a specific token like ETH or AURORA - use get_token_chains_tool instead.
     
-    Returns: A formatted string with [CHAIN] TOKEN format.
+    Args:
+        page: Page of the token list to show (1-based). Use the next page number when the user says "more".
+    
+    Returns: One page of the list in [CHAIN] TOKEN format.
     """
     try:
-        tokens = await get_available_tokens_from_api()
-        # Use chain prefix format
-        return format_tokens_with_chain_prefix(tokens, limit=80)
+        # Refreshes the cache (and its pre-rendered pages) when expired
+        await get_available_tokens_from_api()
+        return get_token_page(page)
     except Exception as e:
         return f"  Can't get supported tokens for now: {str(e)}"
 
@@ -47,16 +119,14 @@ def get_token_chains_tool(token_symbol: str) -> str:
     
     Returns: List of chains where the token is available
     """
-    from knowledge_base import _token_cache
-    
-    tokens = _token_cache if _token_cache else []
+    tokens = knowledge_base._token_cache or []
     if not tokens:
-        return "  Token data not loaded yet. Please try again."
+        return _MSG_TOKENS_NOT_LOADED
     
     symbol_upper = token_symbol.upper().strip()
     
     # Find all entries for this token
-    matching_tokens = [t for t in tokens if t["symbol"].upper() == symbol_upper]
+    matching_tokens = get_tokens_by_symbol(symbol_upper)
     
     if not matching_tokens:
         return f"  Token '{token_symbol}' not found. Use get_available_tokens_tool to see all available tokens."
@@ -88,6 +158,7 @@ async def validate_token_names_tool(token_in: str, token_out: str) -> str:
     """
     try:
         tokens = await get_available_tokens_from_api()
+        # Memoized per token-list snapshot in knowledge_base
         available = get_token_symbols_list(tokens)
         
         match_in = fuzzy_match_token(token_in, available)
@@ -114,8 +185,54 @@ async def validate_token_names_tool(token_in: str, token_out: str) -> str:
         return f"  Can't validate tokens right now: {str(e)}"
 
 
-@tool
-def get_swap_quote_tool(
+@lru_cache(maxsize=256)
+def _split_chains(connected_chains: str) -> Tuple[str, ...]:
+    """Parse the comma-separated connected chains string (defaults to NEAR)."""
+    if not connected_chains:
+        return ("near",)
+    return tuple(sys.intern(c.strip().lower()) for c in connected_chains.split(",") if c.strip())
+
+
+@lru_cache(maxsize=256)
+def _expand_chains(connected_chains: str) -> FrozenSet[str]:
+    """
+    Chains the user can swap from. If any EVM chain is connected
+    (e.g. `eth`), the user has ALL EVM chains.
+    """
+    user_chains = frozenset(_split_chains(connected_chains))
+    if not EVM_CHAINS.isdisjoint(user_chains):
+        return user_chains | EVM_CHAINS
+    return user_chains
+
+
+@lru_cache(maxsize=128)
+def _parse_addr_map(wallet_addresses: str) -> Mapping[str, str]:
+    """
+    Parse "chain:address" pairs into a read-only chain -> address map.
+    Read-only because the cached map is shared across calls.
+    """
+    addr_map = {}
+    if wallet_addresses:
+        for pair in wallet_addresses.split(","):
+            if ":" in pair:
+                chain_key, addr = pair.split(":", 1)
+                addr_map[chain_key.strip().lower()] = addr.strip()
+    return MappingProxyType(addr_map)
+
+
+def _invalid_address_message(address: str, chain: str) -> str:
+    """Error shown when an explicit destination address doesn't fit the destination chain."""
+    expected_format = get_chain_address_format(chain)
+    return (
+        f"  **Invalid Address Format**\n\n"
+        f"The address `{address}` doesn't match the expected format for **{chain.upper()}**.\n"
+        f"Expected: {expected_format}\n\n"
+        f"Please provide a valid {chain.upper()} address."
+    )
+
+
+@tool(response_format="content_and_artifact")
+async def get_swap_quote_tool(
     token_in: str, 
     token_out: str, 
     amount: float, 
@@ -125,7 +242,7 @@ def get_swap_quote_tool(
     destination_address: Optional[str] = None, 
     destination_chain: Optional[str] = None,
     source_chain: Optional[str] = None
-) -> str:
+) -> Tuple[str, Optional[Dict[str, Any]]]:
     """
     Get a real-time swap quote for exchanging tokens via NEAR Intents.
     
@@ -148,57 +265,44 @@ def get_swap_quote_tool(
         source_chain: Specify which chain the SOURCE token is on (e.g., "base" for USDC on Base, "near" for NEAR)
     
     Returns: Quote information or safety error with guidance
+    (artifact {"quote_id": ...} when a quote was stored)
     """
-    if not account_id or account_id == "Not connected":
-        return "  **Wallet Not Connected**\n\nPlease connect your wallet using the Connect button first. You can connect wallets from any chain   NEAR, Ethereum, Solana, Tron, and more."
+    if account_id in _NOT_CONNECTED_SENTINELS:
+        return _MSG_WALLET_NOT_CONNECTED, None
+    
+    # DEBUG: Log parameters (formatted only when DEBUG logging is enabled)
+    logger.debug(
+        "[TOOL] get_swap_quote_tool called: token_in=%s token_out=%s amount=%s "
+        "source_chain=%s destination_chain=%s destination_address=%s",
+        token_in, token_out, amount, source_chain, destination_chain, destination_address
+    )
     
-    # DEBUG: Log parameters
-    print(f"[TOOL] get_swap_quote_tool called:")
-    print(f"[TOOL]   token_in={token_in}, token_out={token_out}, amount={amount}")
-    print(f"[TOOL]   source_chain={source_chain}, destination_chain={destination_chain}")
-    print(f"[TOOL]   destination_address={destination_address}")
+    # Normalize inputs once
+    tin = token_in.upper()
+    tout = token_out.upper()
+    src_chain_l = (source_chain or "").strip().lower() or None
+    dest_chain_l = (destination_chain or "").strip().lower() or None
     
-    # Parse connected chains
-    user_chains = [c.strip().lower() for c in connected_chains.split(",") if c.strip()] if connected_chains else ["near"]
+    # Parse connected chains (EVM chains expanded: `eth` connected => ALL EVM chains)
+    user_chains_expanded = _expand_chains(connected_chains)
     
     # Parse wallet addresses into a dict
-    addr_map = {}
-    if wallet_addresses:
-        for pair in wallet_addresses.split(","):
-            if ":" in pair:
-                chain_key, addr = pair.split(":", 1)
-                addr_map[chain_key.strip().lower()] = addr.strip()
+    addr_map = _parse_addr_map(wallet_addresses)
     
     # Get token cache
-    from knowledge_base import _token_cache, get_token_by_symbol
-    tokens = _token_cache if _token_cache else []
-    
-    # Expand EVM chains: if user has `eth` connected, they have ALL EVM chains
-    from tools import is_evm_chain, EVM_CHAIN_IDS
-    has_evm = any(c in ["eth", "ethereum"] or is_evm_chain(c) for c in user_chains)
-    if has_evm:
-        evm_chain_names = set(EVM_CHAIN_IDS.keys())
-        user_chains_expanded = list(set(user_chains) | evm_chain_names)
-    else:
-        user_chains_expanded = user_chains
+    tokens = knowledge_base._token_cache or []
     
     # -- SAFETY CHECK 1: Validate source token exists --
-    # If source_chain is specified by the LLM, use it to find the correct token variant
-    if source_chain:
-        source_chain = source_chain.strip().lower()
-        source_token = get_token_by_symbol(token_in.upper(), tokens, chain=source_chain)
-        if not source_token:
-            # Try without chain filter as fallback
-            source_token = get_token_by_symbol(token_in.upper(), tokens, chain=None)
-    else:
-        source_token = get_token_by_symbol(token_in.upper(), tokens, chain=None)
+    # If source_chain is specified by the LLM, use it to find the correct token variant,
+    # otherwise prefer a variant on one of the user's connected chains
+    source_token = get_token_best_match(tin, src_chain_l, _split_chains(connected_chains))
     
     if not source_token:
-        return f"  Token '{token_in}' not found. Use get_available_tokens_tool to see available tokens."
+        return _MSG_TOKEN_NOT_FOUND.format(token_in), None
     
     # Determine source chain: prefer explicit source_chain, then token metadata
-    if source_chain:
-        effective_source_chain = source_chain
+    if src_chain_l:
+        effective_source_chain = src_chain_l
     else:
         effective_source_chain = source_token.get("blockchain", "near").lower()
     
@@ -206,50 +310,42 @@ def get_swap_quote_tool(
     source_on_connected = effective_source_chain in user_chains_expanded
     
     if not source_on_connected:
-        all_chains_for_token = list(set(
-            t.get("blockchain", "near").upper() 
-            for t in tokens 
-            if t["symbol"].upper() == token_in.upper()
-        ))
+        all_chains_for_token = list({
+            t.get("blockchain", "near").upper()
+            for t in get_tokens_by_symbol(tin)
+        })
         return (
             f"  **Cannot Swap   Wallet Not Connected**\n\n"
-            f"**{token_in.upper()}** exists on: {', '.join(all_chains_for_token)}\n"
-            f"**Your connected wallets**: {', '.join(c.upper() for c in user_chains)}\n\n"
-            f"You need a connected wallet on one of those chains to swap {token_in.upper()}.\n"
+            f"**{tin}** exists on: {', '.join(all_chains_for_token)}\n"
+            f"**Your connected wallets**: {', '.join(c.upper() for c in _split_chains(connected_chains))}\n\n"
+            f"You need a connected wallet on one of those chains to swap {tin}.\n"
             f"Please connect the appropriate wallet via HOT Kit."
-        )
-    
-    # Re-lookup token with the effective source chain for correct defuseAssetId
-    source_token = get_token_by_symbol(token_in.upper(), tokens, chain=effective_source_chain) or source_token
+        ), None
     
-    # Determine/Validate Destination Chain
-    dest_chain = "near"
-    if destination_chain:
-        dest_chain = destination_chain.strip().lower()
-
     # -- SAFETY CHECK 3: Resolve destination --
     # STRICT LOOKUP: If user specified a chain, we MUST find the token on that chain.
     # Do NOT fallback to default (which finds NEAR token) if explicit chain is requested.
-    lookup_chain = dest_chain if destination_chain else None
-    dest_token = get_token_by_symbol(token_out.upper(), tokens, chain=lookup_chain)
+    dest_token = get_token_by_symbol(tout, tokens, chain=dest_chain_l)
     
     if not dest_token:
-        if destination_chain:
-            return f"  Token '{token_out.upper()}' not found on chain '{dest_chain}'. Use get_available_tokens_tool to check availability."
+        if dest_chain_l:
+            return f"  Token '{tout}' not found on chain '{dest_chain_l}'. Use get_available_tokens_tool to check availability.", None
         else:
             # Fallback for generic request (should verify if this ever happens given safety check 1)
             # Try to find ANY token match
-            dest_token = get_token_by_symbol(token_out.upper(), tokens)
+            dest_token = get_token_by_symbol(tout, tokens)
             
     if not dest_token:
-        return f"  Token '{token_out}' not found. Use get_available_tokens_tool to see available tokens."
+        return _MSG_TOKEN_NOT_FOUND.format(token_out), None
 
     dest_chain = dest_token.get("blockchain", "near").lower()
+    dest_chain_u = dest_chain.upper()
+    source_chain_u = effective_source_chain.upper()
     
     # -- SAFETY CHECK 4: Validate recipient format matching destination chain --
     # If using an explicit destination address, ensure it matches the token's chain
     if destination_address:
-        is_evm_addr = destination_address.startswith("0x") and len(destination_address) == 42
+        is_evm_addr = EVM_ADDRESS_RE.fullmatch(destination_address) is not None
         is_evm_token = is_evm_chain(dest_chain)
         
         if is_evm_addr and not is_evm_token:
@@ -257,12 +353,12 @@ def get_swap_quote_tool(
             # We must fail and ask for the chain
             return (
                 f"  **Chain Not Specified**\n\n"
-                f"You provided an Ethereum-style address (`{destination_address}`) but the system selected **{token_out.upper()} on {dest_chain.upper()}**.\n"
+                f"You provided an Ethereum-style address (`{destination_address}`) but the system selected **{tout} on {dest_chain_u}**.\n"
                 f"This mismatch usually happens if you didn't specify the destination chain.\n\n"
                 f"Please try again specifying the chain, e.g.:\n"
                 f"- \"swap {token_in} to {token_out} **on Base**\"\n"
                 f"- \"swap {token_in} to {token_out} **on Arbitrum**\""
-            )
+            ), None
             
     # Determine if cross-chain
     is_cross_chain = dest_chain != effective_source_chain
@@ -271,15 +367,11 @@ def get_swap_quote_tool(
     # IMPORTANT: If user provides an explicit destination_address, ALWAYS use it
     # This handles "send USDC to frigid_degen5.user.intear.near" even on same chain
     if destination_address:
-        # User provided explicit address   validate format
-        if is_cross_chain and not validate_address_for_chain(destination_address, dest_chain):
-            expected_format = get_chain_address_format(dest_chain)
-            return (
-                f"  **Invalid Address Format**\n\n"
-                f"The address `{destination_address}` doesn't match the expected format for **{dest_chain.upper()}**.\n"
-                f"Expected: {expected_format}\n\n"
-                f"Please provide a valid {dest_chain.upper()} address."
-            )
+        # User provided explicit address   validate format before any quote is
+        # requested (a quote allocates a real deposit address).
+        # Runs in a worker thread: the first EVM check imports web3.
+        if is_cross_chain and not await asyncio.to_thread(validate_address_for_chain, destination_address, dest_chain):
+            return _invalid_address_message(destination_address, dest_chain), None
         recipient = destination_address
     elif is_cross_chain:
         # Cross-chain, no explicit address   try to auto-fill from connected wallets
@@ -293,10 +385,10 @@ def get_swap_quote_tool(
             expected_format = get_chain_address_format(dest_chain)
             return (
                 f"  **Cross-Chain Swap   Address Needed**\n\n"
-                f"You want to receive **{token_out.upper()}** on **{dest_chain.upper()}** chain.\n"
-                f"You don't have a {dest_chain.upper()} wallet connected.\n\n"
-                f"Please provide your **{dest_chain.upper()} wallet address** ({expected_format})."
-            )
+                f"You want to receive **{tout}** on **{dest_chain_u}** chain.\n"
+                f"You don't have a {dest_chain_u} wallet connected.\n\n"
+                f"Please provide your **{dest_chain_u} wallet address** ({expected_format})."
+            ), None
     else:
         # Same chain, no explicit address   use the connected wallet for that chain
         # For NEAR source, use 'near' key; for EVM source, use 'eth' key
@@ -314,22 +406,22 @@ def get_swap_quote_tool(
         
         # Validate EVM refund address
         # If fallback to account_id occurred (and account_id is "user.near"), it will fail validation
-        if not refund_addr or not refund_addr.startswith("0x") or len(refund_addr) != 42:
+        if not refund_addr or not EVM_ADDRESS_RE.fullmatch(refund_addr):
              return (
                 f"  **Missing EVM Address for Refund**\n\n"
-                f"You are swapping from **{effective_source_chain.upper()}**, so we need your EVM wallet address for refunds.\n"
+                f"You are swapping from **{source_chain_u}**, so we need your EVM wallet address for refunds.\n"
                 f"We couldn't find a valid EVM address in your connected wallets.\n\n"
                 f"**Please connect your Ethereum/EVM wallet** to proceed."
-            )
+            ), None
             
     elif effective_source_chain == "near":
         refund_addr = addr_map.get("near", account_id)
     else:
         refund_addr = addr_map.get(effective_source_chain, account_id)
     
-    quote = _get_swap_quote(
-        token_in.upper(), 
-        token_out.upper(), 
+    quote = await _aget_swap_quote(
+        tin, 
+        tout, 
         amount, 
         chain_id=effective_source_chain,  # Determines depositType (ORIGIN_CHAIN for EVM, INTENTS for NEAR)
         recipient_id=recipient,
@@ -340,13 +432,12 @@ def get_swap_quote_tool(
     )
     
     if "error" in quote:
-        return f"  Error getting quote: {quote['error']}"
+        return f"  Error getting quote: {quote['error']}", None
     
-    # Store quote globally for confirmation
-    global _last_quote
-    _last_quote = {
-        "token_in": token_in.upper(),
-        "token_out": token_out.upper(),
+    # Store quote for this session for confirmation
+    last_quote = {
+        "token_in": tin,
+        "token_out": tout,
         "amount": amount,
         "amount_out": quote['amount_out'],
         "min_amount_out": quote['amount_out'] * 0.99,  # 1% slippage
@@ -357,64 +448,65 @@ def get_swap_quote_tool(
         "source_chain": effective_source_chain,
         "account_id": account_id  # Needed for tx builder ft_transfer_call msg
     }
+    await asyncio.to_thread(save_pending_quote, current_session_id.get(), last_quote)
     
     # Format response
-    dest_info = f" on **{dest_chain.upper()}**" if is_cross_chain else ""
+    dest_info = f" on **{dest_chain_u}**" if is_cross_chain else ""
     auto_filled = not destination_address and is_cross_chain and (dest_chain in addr_map or ("eth" if is_evm_chain(dest_chain) else "") in addr_map)
-    addr_note = f"\n  _Using your connected {dest_chain.upper()} address. Reply 'use [address]' to change._" if auto_filled else ""
+    addr_note = f"\n  _Using your connected {dest_chain_u} address. Reply 'use [address]' to change._" if auto_filled else ""
     
-    return (
-        f"  **Swap Quote**\n"
-        f"**Swap**: {amount} [{effective_source_chain.upper()}] {token_in.upper()} -> ~{quote['amount_out']:.6f} [{dest_chain.upper()}] {token_out.upper()}\n"
-        f"**Rate**: 1 {token_in.upper()} = {quote['rate']:.6f} {token_out.upper()}\n"
-        f"**Recipient**: `{recipient}`{dest_info}\n"
-        f"{addr_note}\n\n"
-        f"[QUOTE_ID: {id(_last_quote)}]\n"
-        f"Present this quote to the user. Ask them to reply 'yes' or 'confirm' to proceed, or 'no' to cancel."
-    )
-
+    return "\n".join((
+        _MSG_QUOTE_HEADER,
+        f"**Swap**: {amount} [{source_chain_u}] {tin} -> ~{quote['amount_out']:.6f} [{dest_chain_u}] {tout}",
+        f"**Rate**: 1 {tin} = {quote['rate']:.6f} {tout}",
+        f"**Recipient**: `{recipient}`{dest_info}",
+        addr_note,
+        "",
+        f"[QUOTE_ID: {id(last_quote)}]",
+        _MSG_QUOTE_INSTRUCTIONS,
+    )), {"quote_id": id(last_quote)}
 
 
-# Global storage for last quote
-_last_quote = None
 
 
-@tool
-def confirm_swap_tool() -> str:
+@tool(response_format="content_and_artifact")
+async def confirm_swap_tool() -> Tuple[str, Optional[Dict[str, Any]]]:
     """
     Confirm and prepare the swap transaction after user approves the quote.
     Call this ONLY when user explicitly confirms (says yes, okay, proceed, go ahead, etc).
     This uses the most recent quote that was provided to the user.
     
     Returns: Status message about transaction preparation
+    (artifact {"transaction_ready": True, ...} when the transaction is built)
     """
-    global _last_quote
+    last_quote = await get_last_quote()
     
-    if not _last_quote:
-        return "  No recent quote found. Please get a quote first by asking for a swap."
+    if not last_quote:
+        return _MSG_NO_RECENT_QUOTE, None
     
     try:
-        from tools import create_deposit_transaction, get_sign_action_type
-        
-        source_chain = _last_quote.get("source_chain", "near").lower()
+        source_chain = last_quote.get("source_chain", "near").lower()
         
         tx_payload = create_deposit_transaction(
-            token_in=_last_quote["token_in"],
-            token_out=_last_quote["token_out"],
-            amount=_last_quote["amount"],
-            min_amount_out=_last_quote.get("min_amount_out", 0),
-            deposit_address=_last_quote["deposit_address"],
+            token_in=last_quote["token_in"],
+            token_out=last_quote["token_out"],
+            amount=last_quote["amount"],
+            min_amount_out=last_quote.get("min_amount_out", 0),
+            deposit_address=last_quote["deposit_address"],
             source_chain=source_chain,
-            account_id=_last_quote.get("account_id", "")
+            account_id=last_quote.get("account_id", "")
         )
         
         action_type = get_sign_action_type(source_chain)
         
-        # Return special marker that agents.py will detect
-        return f"[TRANSACTION_READY] Transaction prepared for {source_chain.upper()}. Action: {action_type}. User needs to sign in their wallet."
+        # Text marker is for the LLM; agents.py reads the artifact
+        return (
+            f"[TRANSACTION_READY] Transaction prepared for {source_chain.upper()}. Action: {action_type}. User needs to sign in their wallet.",
+            {"transaction_ready": True, "action": action_type},
+        )
         
     except Exception as e:
-        return f"  Error preparing transaction: {str(e)}"
+        return f"  Error preparing transaction: {str(e)}", None
 
 
 
@@ -429,16 +521,7 @@ def hot_pay_coming_soon_tool(query: str) -> str:
     
     Returns: A standard "Feature In Progress" message.
     """
-    return (
-        "  **Feature In Progress**\n\n"
-        "HOT Pay integration (Payment Links & Merchant Tracking) is currently being developed.\n"
-        "I know about these features, but I can't execute them just yet!\n\n"
-        "Current capabilities:\n"
-        "  Token Swaps\n"
-        "  Balance Checks\n"
-        "  Cross-Chain Bridge\n"
-        "  Merchant Payments (Coming Soon)"
-    )
+    return _MSG_HOT_PAY_COMING_SOON
 
 
 # ===================================================================
@@ -547,7 +630,7 @@ def list_strategies_tool(wallet_address: str) -> str:
 
         strategies = get_active_strategies(wallet_address)
         if not strategies:
-            return "You don't have any active strategies yet. Would you like me to set one up? I can help with:\n\n  **Price Alert**   Alert when a token drops or surges past a threshold\n  **Stop Loss**   Auto-sell when a token drops dangerously\n  **Portfolio Rebalance**   Keep your portfolio balanced\n\nJust tell me what you'd like!"
+            return _MSG_NO_STRATEGIES
 
         msg = f"  **Your Active Strategies** ({len(strategies)} total)\n\n"
         for s in strategies:
@@ -632,7 +715,7 @@ def update_autonomy_settings_tool(
             updates["kill_switch"] = kill_switch
 
         if not updates:
-            return "No settings were changed. Tell me what you'd like to update:\n  Autonomy level (Off / Notify / Auto)\n  Max per transaction\n  Daily spending limit\n  Kill switch (on/off)"
+            return _MSG_NO_SETTINGS_CHANGED
 
         upsert_user(wallet_address, updates)
 
@@ -672,7 +755,7 @@ def get_autonomy_status_tool(wallet_address: str) -> str:
         logs = get_agent_logs(wallet_address, limit=5)
 
         if not user:
-            return "You haven't set up autonomy yet. Would you like me to help? I can configure:\n  Your autonomy level (Off / Notify / Auto)\n  Spending limits and guardrails\n  Trading strategies (price alerts, stop-loss, rebalancing)"
+            return _MSG_AUTONOMY_NOT_SET_UP
 
         levels = {0: "Off", 1: "Notify Only", 2: "Auto-Execute"}
         kill = "  ACTIVE" if user["kill_switch"] else "  Off"
@@ -708,6 +791,11 @@ SWAP_TOOL_LIST = [
     hot_pay_coming_soon_tool,
 ]
 
+# Tools whose output is already the user-facing answer. When a turn calls
+# only these, the swap agent returns their output without a follow-up LLM call.
+for _final_tool in (get_available_tokens_tool, hot_pay_coming_soon_tool):
+    _final_tool.metadata = {**(_final_tool.metadata or {}), "final": True}
+
 # Autonomy Agent   handles strategies, settings, guardrails
 AUTONOMY_TOOL_LIST = [
     create_strategy_tool,
@@ -3,30 +3,71 @@ LangChain agent for NEAR token swaps and Flow blockchain operations.
 LLM decides which tools to call based on user query.
 Dual-agent routing: HOT Kit users -> NEAR Intents, Flow Wallet users -> Flow agent.
 """
+import asyncio
 import json
+import logging
 import os
-from typing import Dict, Any
+import random
+import re
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Set, Tuple, AsyncIterator, Awaitable, Callable
 
+import httpx
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, ToolMessage
 
-from agent_tools import TOOL_LIST, SWAP_TOOL_LIST, AUTONOMY_TOOL_LIST
+from agent_tools import TOOL_LIST, SWAP_TOOL_LIST, AUTONOMY_TOOL_LIST, NO_SESSION_ID, current_session_id, get_last_quote
+from tools import create_deposit_transaction, get_sign_action_type, is_evm_chain
+from knowledge_base import ensure_token_cache
 from prompts import MASTER_SYSTEM_PROMPT
-from flow_agent_tools import FLOW_TOOL_LIST
+from flow_agent_tools import FLOW_TOOL_LIST, get_flow_last_quote
+from flow_tools import flow_build_swap_transaction
 from flow_prompts import FLOW_SYSTEM_PROMPT
 from autonomy_prompts import AUTONOMY_SYSTEM_PROMPT
 from orchestrator import orchestrate_compound_query
+from context_window import count_tokens, history_budget
+
+logger = logging.getLogger(__name__)
 
 
 # Initialize LLM with NEAR AI endpoint
 api_key = os.getenv("NEAR_AI_API_KEY") or os.getenv("OPENAI_API_KEY")
 
+# One pooled HTTP/2 client shared by every agent LLM binding below
+llm_http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+    timeout=httpx.Timeout(120.0, connect=10.0)
+)
+
 llm = ChatOpenAI(
     model="openai/gpt-oss-120b",
     temperature=0.3,
     openai_api_key=api_key,
-    openai_api_base="https://cloud-api.near.ai/v1"
+    openai_api_base="https://cloud-api.near.ai/v1",
+    http_async_client=llm_http_client
+)
+
+# NEAR AI returns empty responses for AIMessage(tool_calls=...) + ToolMessage
+# turns, so by default tool results are replayed as plain HumanMessages behind
+# a bridge AIMessage. Set PROVIDER_NATIVE_TOOLS=1 for providers that handle
+# real tool messages (shorter prompt, cacheable tool-call prefix).
+PROVIDER_SUPPORTS_TOOL_MESSAGES = os.getenv("PROVIDER_NATIVE_TOOLS", "0") == "1"
+
+# Send the chat session id as prompt_cache_key, so providers that support it
+# (OpenAI-style prefix caching) route a session's calls to the same cache.
+# Off by default: the NEAR AI endpoint is not known to accept the field.
+SEND_PROMPT_CACHE_KEY = os.getenv("PROMPT_CACHE_KEY", "0") == "1"
+
+# Deterministic binding for rolling history summaries (see summarize_history)
+summary_llm = ChatOpenAI(
+    model="openai/gpt-oss-120b",
+    temperature=0,
+    openai_api_key=api_key,
+    openai_api_base="https://cloud-api.near.ai/v1",
+    http_async_client=llm_http_client
 )
 
 # -- Per-Agent LLM Bindings (each gets ONLY its own tools) ------
@@ -40,6 +81,11 @@ llm_with_flow_tools = llm.bind_tools(FLOW_TOOL_LIST)
 # Autonomy Agent: strategies, guardrails, settings
 llm_with_autonomy_tools = llm.bind_tools(AUTONOMY_TOOL_LIST)
 
+# Tool lookup by name (one dict per agent, built once)
+TOOL_BY_NAME = {t.name: t for t in TOOL_LIST}
+FLOW_TOOL_BY_NAME = {t.name: t for t in FLOW_TOOL_LIST}
+AUTONOMY_TOOL_BY_NAME = {t.name: t for t in AUTONOMY_TOOL_LIST}
+
 # System message for the SWAP agent (lean   no autonomy instructions)
 SYSTEM_MESSAGE = MASTER_SYSTEM_PROMPT + """
 
@@ -53,9 +99,23 @@ SYSTEM_MESSAGE = MASTER_SYSTEM_PROMPT + """
 
 REMEMBER: If user asks about a SPECIFIC token -> get_token_chains_tool. If user wants ALL tokens -> get_available_tokens_tool.
 If user asks about payment links or tracking -> use hot_pay_coming_soon_tool.
+When several lookups are needed, call them ALL in ONE response (e.g. get_token_chains_tool for both tokens, plus validate_token_names_tool); they run in parallel, saving a round trip.
 Be conversational, friendly, and concise. You are Neptune AI.
 """
 
+# Message objects are immutable in practice, so the system messages are built once
+SYSTEM_MSG = SystemMessage(content=SYSTEM_MESSAGE)
+AUTONOMY_SYSTEM_MSG = SystemMessage(content=AUTONOMY_SYSTEM_PROMPT)
+
+# Instructions appended after tool results on the swap agent's follow-up call
+SWAP_NEXT_ACTION_INSTRUCTIONS = (
+    "Based on this data, take the NEXT action:\n"
+    "- If you now have enough info to swap (token, amount, chains confirmed), call `get_swap_quote_tool` NOW.\n"
+    "- If the user needs to choose or you need more info, respond with a question.\n"
+    "- NEVER respond with text saying 'Fetching quote...' or 'Let me get a quote' without ACTUALLY calling the tool.\n"
+    "- If a tool errored, try once more or explain the issue to the user."
+)
+
 # -- Intent Classifier: Route to the right agent -----------------
 
 AUTONOMY_KEYWORDS = {
@@ -88,6 +148,29 @@ FLOW_KEYWORDS = {
     "flow", "nft", "transfer nft", "flow token",
 }
 
+# Whole words that confirm a pending quote ("okay"/"confirmed" were matched as substrings before)
+CONFIRM_WORDS = frozenset({"yes", "confirm", "confirmed", "go", "proceed", "ok", "okay", "sure", "yep", "yeah", "y"})
+# One case-insensitive scan that stops at the first confirmation word
+_CONFIRM_RE = re.compile(
+    r"\b(?:" + "|".join(sorted(CONFIRM_WORDS, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE
+)
+
+
+# Whole words that decline a pending quote; they win over any confirm word
+# ("no, don't go ahead", "not ok"). Words ending in n't count too.
+DECLINE_WORDS = frozenset({"no", "not", "nope", "nah", "never", "cancel", "stop", "dont", "wait"})
+_DECLINE_RE = re.compile(
+    r"\b(?:" + "|".join(sorted(DECLINE_WORDS, key=len, reverse=True)) + r")\b|\Bn['’]t\b",
+    re.IGNORECASE
+)
+
+
+def _is_confirmation(msg: str) -> bool:
+    """Check if the user's reply confirms a pending quote (whole-word match, no negation)."""
+    return _DECLINE_RE.search(msg) is None and _CONFIRM_RE.search(msg) is not None
+
+
 def _is_compound_query(msg: str) -> bool:
     """Detect if a message contains intents for MULTIPLE agent domains."""
     msg_lower = msg.lower()
@@ -101,6 +184,121 @@ def _is_compound_query(msg: str) -> bool:
     return domains_hit >= 2
 
 
+def _format_wallet_block(
+    account_id: str,
+    connected_chains: List[str],
+    wallet_addresses: Dict[str, str],
+    balances: Dict[str, Any]
+) -> str:
+    """Build the [User wallet: ...] context block appended to the user's message."""
+    parts = [f"[User wallet: {account_id}"]
+    if connected_chains:
+        parts.append(f"connected_chains: [{', '.join(connected_chains)}]")
+    if wallet_addresses:
+        parts.append("addresses: " + ", ".join(f"{chain}: {addr}" for chain, addr in wallet_addresses.items()))
+    if balances:
+        parts.append("balances: " + ", ".join(f"{chain}: {amt}" for chain, amt in balances.items()))
+    return " | ".join(parts) + "]"
+
+
+# -- History selection ---------------------------------------------
+
+HISTORY_TOKEN_BUDGET = history_budget(llm.model_name)
+
+
+def select_rounds(
+    history: List[Dict[str, str]],
+    max_rounds: int = 3,
+    max_tokens: int = HISTORY_TOKEN_BUDGET
+) -> List[Dict[str, str]]:
+    """
+    Select the most recent whole conversation rounds (user msg + AI reply)
+    that fit the token budget, oldest first. The newest round is always kept,
+    even over budget, so short follow-ups ("yes") keep their context.
+    Rounds are never split, so replayed history always starts with a user
+    message and alternates user/AI (NEAR AI returns empty responses otherwise).
+    Uses the "tokens" count stored with each message when present (see
+    main._finish_chat), else context_window.count_tokens.
+    """
+    selected: List[Dict[str, str]] = []
+    round_msgs: List[Dict[str, str]] = []
+    round_tokens = 0
+    used_tokens = 0
+    rounds = 0
+    
+    for msg in reversed(history):
+        round_msgs.append(msg)
+        tokens = msg.get("tokens")
+        round_tokens += tokens if tokens is not None else count_tokens(msg.get("content") or "")
+        if msg.get("role") != "user":
+            continue
+        # Reached the start of a round
+        if rounds >= max_rounds or (rounds and used_tokens + round_tokens > max_tokens):
+            break
+        selected.extend(round_msgs)
+        used_tokens += round_tokens
+        rounds += 1
+        round_msgs = []
+        round_tokens = 0
+    
+    selected.reverse()
+    return selected
+
+
+_HISTORY_MESSAGE_TYPES = {"user": HumanMessage, "ai": AIMessage}
+
+
+@lru_cache(maxsize=2048)
+def _history_message(role: str, content: str) -> Any:
+    """
+    LangChain message for one history entry. The same entries are replayed
+    on every turn, so each is built (and validated) once and shared;
+    messages are never mutated after construction.
+    """
+    return _HISTORY_MESSAGE_TYPES[role](content=content)
+
+
+def _history_to_messages(history: List[Dict[str, str]]) -> List[Any]:
+    """Convert stored {role, content} history into LangChain messages."""
+    return [
+        _history_message(msg["role"], msg["content"])
+        for msg in history
+        if msg["role"] in _HISTORY_MESSAGE_TYPES
+    ]
+
+
+SUMMARY_PROMPT = """You maintain a running summary of a chat between a user and Neptune AI, a crypto swap assistant.
+Merge the previous summary with the new messages into ONE updated summary of at most 150 words.
+Keep facts that later turns may rely on: tokens, amounts, chains, addresses, stated preferences,
+strategies set up, and open questions. Drop greetings and small talk. Return only the summary text."""
+SUMMARY_SYSTEM_MSG = SystemMessage(content=SUMMARY_PROMPT)
+
+
+async def summarize_history(previous_summary: str, messages: List[Dict[str, str]]) -> str:
+    """
+    Fold messages that left the verbatim history window into the running
+    summary. Returns the updated summary (the previous one on failure).
+    """
+    transcript = "\n".join(f"{m['role'].upper()}: {m['content']}" for m in messages)
+    try:
+        response = await summary_llm.ainvoke([
+            SUMMARY_SYSTEM_MSG,
+            HumanMessage(content=f"Previous summary:\n{previous_summary or '(none)'}\n\nNew messages:\n{transcript}")
+        ])
+        return (response.content or "").strip() or previous_summary
+    except Exception as e:
+        logger.warning("History summary failed, keeping previous summary: %s", e)
+        return previous_summary
+
+
+def _summary_messages(user_context: Dict[str, Any]) -> List[Any]:
+    """The rolling history summary as a message list (empty when there is none)."""
+    summary = user_context.get("history_summary")
+    if not summary:
+        return []
+    return [SystemMessage(content=f"Prior conversation summary: {summary}")]
+
+
 async def process_message(
     user_msg: str,
     session_state: Dict[str, Any],
@@ -121,17 +319,14 @@ async def process_message(
     account_id = user_context.get("account_id", "Not connected")
     current_step = session_state.get("step", "IDLE")
     wallet_type = user_context.get("wallet_type", "hotkit").lower()
+    current_session_id.set(user_context.get("session_id") or NO_SESSION_ID)
     
-    print(f"[AGENT] Processing: {user_msg} | Step: {current_step} | Account: {account_id} | Wallet: {wallet_type}")
+    logger.info("Processing: %s | Step: %s | Account: %s | Wallet: %s", user_msg, current_step, account_id, wallet_type)
     
     # -- Handle confirmation state FIRST (before routing) ----------
     if current_step == "WAITING_CONFIRMATION":
         pending = session_state.get("pending_quote", {})
-        user_lower = user_msg.lower().strip()
-        is_confirmed = any(word in user_lower for word in ["yes", "confirm", "go", "proceed", "ok", "sure", "yep", "yeah"])
-        
-        if is_confirmed:
-            from tools import create_deposit_transaction, get_sign_action_type
+        if _is_confirmation(user_msg):
             source_chain = pending.get("source_chain", "near").lower()
             tx_payload = create_deposit_transaction(
                 token_in=pending["token_in"],
@@ -162,7 +357,10 @@ async def process_message(
     
     # 2. Compound query (multiple domains) -> Orchestrator
     if _is_compound_query(user_msg):
-        print(f"[ROUTER] -> Orchestrator (compound query)")
+        logger.info("[ROUTER] -> Orchestrator (compound query)")
+        # Sub-agents run concurrently and their replies are merged afterwards,
+        # so their tokens must not be streamed (this only affects this task)
+        _token_sink.set(None)
         return await orchestrate_compound_query(
             user_msg=user_msg,
             session_state=session_state,
@@ -174,18 +372,367 @@ async def process_message(
     
     # 3. Autonomy-related -> Autonomy agent
     if _is_autonomy_message(user_msg):
-        print(f"[ROUTER] -> Autonomy Agent")
+        logger.info("[ROUTER] -> Autonomy Agent")
         return await _process_autonomy_message(user_msg, session_state, user_context)
     
     # 4. Default -> Swap agent (NEAR Intents)
-    print(f"[ROUTER] -> Swap Agent")
+    logger.info("[ROUTER] -> Swap Agent")
     return await _process_swap_message(user_msg, session_state, user_context)
 
 
+# -- Streaming -----------------------------------------------------
+
+# Receives answer tokens while process_message_stream is driving the request
+_token_sink: ContextVar[Optional[Callable[[str], None]]] = ContextVar("_token_sink", default=None)
+
+
+# Text a tool-enabled pass may produce before it is known not to be a
+# tool-calling pass; held back from the stream until then
+STREAM_HOLDBACK_CHARS = 200
+
+
+async def _ainvoke_llm(runnable: Any, messages: List[Any]) -> Any:
+    """
+    Call the LLM. When a stream consumer is active, use astream and forward
+    content tokens as they arrive; the merged chunk still carries tool_calls.
+    Only answer text is streamed: on a tool-enabled pass the content is held
+    back until STREAM_HOLDBACK_CHARS (or the end) without tool-call chunks,
+    and a pass that turns out to call tools is never streamed.
+    """
+    kwargs = {"extra_body": {"prompt_cache_key": current_session_id.get()}} if SEND_PROMPT_CACHE_KEY else {}
+    sink = _token_sink.get()
+    if sink is None:
+        return await runnable.ainvoke(messages, **kwargs)
+    
+    tools_bound = bool(getattr(runnable, "kwargs", {}).get("tools"))
+    held: Optional[List[str]] = [] if tools_bound else None
+    held_chars = 0
+    calls_tools = False
+    response = None
+    async for chunk in runnable.astream(messages, **kwargs):
+        response = chunk if response is None else response + chunk
+        if chunk.tool_call_chunks:
+            if held is None and not calls_tools:
+                logger.warning("Tool call after streamed text; the streamed text is superseded")
+            calls_tools = True
+        if calls_tools or not chunk.content:
+            continue
+        if held is None:
+            sink(chunk.content)
+            continue
+        held.append(chunk.content)
+        held_chars += len(chunk.content)
+        if held_chars >= STREAM_HOLDBACK_CHARS:
+            sink("".join(held))
+            held = None
+    if held and not calls_tools:
+        sink("".join(held))
+    return response
+
+
+# -- Tool retries --------------------------------------------------
+
+class RetryBudget:
+    """
+    Shared cap on tool retries for one request. Once a flaky upstream has
+    used it up, later failing tools fail fast instead of stalling too.
+    """
+    __slots__ = ("remaining",)
+
+    def __init__(self, max_total_retries: int = 2):
+        self.remaining = max_total_retries
+
+    def take(self) -> bool:
+        """Consume one retry if any are left."""
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+
+# Process-wide cap on in-flight tool invocations, across all sessions, so
+# gathered tool calls cannot burst past upstream API rate limits
+TOOL_CONCURRENCY = int(os.getenv("TOOL_CONCURRENCY", "10"))
+_tool_semaphore = asyncio.Semaphore(TOOL_CONCURRENCY)
+
+
+async def _invoke_with_retry(
+    tool: Any,
+    tool_input: Dict[str, Any],
+    budget: RetryBudget,
+    log_prefix: str = "[AGENT]",
+    attempts: int = 2
+) -> Any:
+    """
+    Invoke a tool, retrying with jittered exponential backoff while the
+    request's retry budget allows. Re-raises the last error.
+    tool_input is the args dict, or a tool call (returns a ToolMessage).
+    Each attempt holds a _tool_semaphore slot; backoff sleeps do not.
+    """
+    for attempt in range(attempts):
+        try:
+            async with _tool_semaphore:
+                return await tool.ainvoke(tool_input)
+        except Exception as e:
+            logger.warning("%s Tool %s failed (attempt %d): %s", log_prefix, tool.name, attempt + 1, e)
+            if attempt + 1 >= attempts or not budget.take():
+                raise
+            await asyncio.sleep(min(0.2 * 2 ** attempt, 0.5) + random.uniform(0, 0.1))
+
+
+# Streamed turns that outlived their client (kept referenced until done)
+_detached_turns: Set[asyncio.Task] = set()
+
+
+async def process_message_stream(
+    user_msg: str,
+    session_state: Dict[str, Any],
+    user_context: Dict[str, Any] = {},
+    finish: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of process_message.
+    Yields {"type": "token", "content": str} events while the agent's
+    answer is generated (swap, autonomy and flow; not compound queries), then a single {"type": "result", "result": dict}
+    with the same dict process_message returns. The result's response is
+    authoritative (e.g. it replaces the text when a transaction was prepared).
+    With finish, the turn runs finish(result) (e.g. saving the session) and
+    the result event carries its return value instead. If the turn fails the
+    last event is {"type": "error", "error": str}.
+    If the client goes away mid-stream the turn is not cancelled: it runs to
+    completion, including finish, like a /chat request would.
+    """
+    async def run_turn() -> Any:
+        result = await process_message(user_msg, session_state, user_context)
+        return await finish(result) if finish is not None else result
+    
+    queue: asyncio.Queue = asyncio.Queue()
+    sink_token = _token_sink.set(queue.put_nowait)
+    try:
+        # The task copies the current context, so it sees the sink
+        task = asyncio.create_task(run_turn())
+    finally:
+        _token_sink.reset(sink_token)
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    
+    try:
+        while (content := await queue.get()) is not None:
+            yield {"type": "token", "content": content}
+        try:
+            result = task.result()
+        except Exception as e:
+            logger.exception("Streamed turn failed: %s", e)
+            yield {"type": "error", "error": "Something went wrong while processing your message."}
+        else:
+            yield {"type": "result", "result": result}
+    finally:
+        # Client went away mid-stream: let the turn finish on its own
+        if not task.done():
+            _detached_turns.add(task)
+            task.add_done_callback(_detached_turns.discard)
+
+
 # ==================================================================
 # SWAP AGENT   handles token swaps, quotes, discovery
 # ==================================================================
 
+async def _run_swap_tool_call(
+    tool_call: Dict[str, Any],
+    account_id: str,
+    retry_budget: RetryBudget
+) -> Tuple[str, Any, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Execute one swap-agent tool call (one retry on failure, budget permitting).
+    Returns (tool_name, tool_result, tx_payload, artifact); tx_payload is only
+    set for prepare_swap_transaction_tool, artifact is the structured flags a
+    content_and_artifact tool returned (e.g. {"transaction_ready": True}).
+    """
+    tool_name = tool_call["name"]
+    tool_args = tool_call["args"]
+    
+    logger.debug("Calling tool: %s with args: %s", tool_name, tool_args)
+    
+    # Special handling for transaction preparation
+    if tool_name == "prepare_swap_transaction_tool":
+        try:
+            tx_payload = create_deposit_transaction(
+                token_in=tool_args["token_in"],
+                token_out=tool_args["token_out"],
+                amount=tool_args["amount"],
+                min_amount_out=tool_args.get("min_amount_out", 0),
+                deposit_address=tool_args["deposit_address"],
+                source_chain=tool_args.get("source_chain", "near"),
+                account_id=tool_args.get("account_id", account_id)
+            )
+            return tool_name, "  Transaction prepared successfully and ready for user signature.", tx_payload, None
+        except Exception as e:
+            logger.error("Transaction prep error: %s", e)
+            return tool_name, f"  Error preparing transaction: {str(e)}", None, None
+    
+    # Find and execute the tool normally
+    tool = TOOL_BY_NAME.get(tool_name)
+    if tool is None:
+        tool_result = f"Tool {tool_name} not found"
+        logger.warning("%s", tool_result)
+        return tool_name, tool_result, None, None
+    
+    artifact = None
+    try:
+        logger.debug("Executing tool: %s", tool_name)
+        # Invoked as a tool call so the ToolMessage carries the tool's artifact
+        # (LangChain drops the artifact when there is no tool_call_id)
+        tool_message = await _invoke_with_retry(
+            tool,
+            {"name": tool_name, "args": tool_args, "id": tool_call.get("id") or tool_name, "type": "tool_call"},
+            retry_budget
+        )
+        tool_result = tool_message.content
+        artifact = tool_message.artifact
+        logger.debug("Tool result: %s", tool_result[:200] if isinstance(tool_result, str) else tool_result)
+    except Exception as e:
+        logger.exception("Tool %s failed", tool_name)
+        tool_result = f"Error calling tool: {str(e)}"
+    
+    return tool_name, tool_result, None, artifact
+
+
+# Tools that read state written by another tool in the same turn
+# (confirm_swap_tool reads the quote get_swap_quote_tool stores)
+SWAP_TOOL_DEPENDENCIES = {
+    "confirm_swap_tool": frozenset({"get_swap_quote_tool"}),
+}
+
+
+def _plan_tool_layers(
+    tool_calls: List[Dict[str, Any]],
+    dependencies: Dict[str, frozenset] = SWAP_TOOL_DEPENDENCIES
+) -> List[List[int]]:
+    """
+    Group one turn's tool calls into layers (Kahn's algorithm). Every call
+    only depends on calls in earlier layers, so each layer can run concurrently.
+    Returns lists of indexes into tool_calls.
+    """
+    names = [tc["name"] for tc in tool_calls]
+    deps = {
+        i: {j for j, other in enumerate(names)
+            if j != i and other in dependencies.get(name, ())}
+        for i, name in enumerate(names)
+    }
+    
+    layers = []
+    remaining = set(deps)
+    while remaining:
+        ready = sorted(i for i in remaining if not deps[i] & remaining)
+        if not ready:
+            # Dependency cycle: run whatever is left together
+            ready = sorted(remaining)
+        layers.append(ready)
+        remaining.difference_update(ready)
+    return layers
+
+
+# Lookups without side effects: identical calls within one user turn
+# (same name and args) run once and share the result
+SWAP_READ_ONLY_TOOLS = frozenset({
+    "get_available_tokens_tool",
+    "get_token_chains_tool",
+    "validate_token_names_tool",
+})
+
+
+def _read_only_call_key(tool_call: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """Cache key for a read-only tool call, None for tools with side effects."""
+    if tool_call["name"] not in SWAP_READ_ONLY_TOOLS:
+        return None
+    return tool_call["name"], json.dumps(tool_call["args"], sort_keys=True, default=str)
+
+
+def _tool_call_failed(result: Any) -> bool:
+    """True for a gathered exception or an "Error calling tool" result."""
+    if isinstance(result, BaseException):
+        return True
+    tool_result = result[1]
+    return isinstance(tool_result, str) and tool_result.startswith("Error calling tool")
+
+
+async def _run_swap_tool_calls(
+    tool_calls: List[Dict[str, Any]],
+    account_id: str,
+    retry_budget: RetryBudget,
+    result_cache: Optional[Dict[Tuple[str, str], "asyncio.Future"]] = None
+) -> List[Tuple[str, Any, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+    """
+    Execute all tool calls from one LLM turn, results in call order.
+    Independent calls run concurrently; calls that depend on another tool's
+    side effects (SWAP_TOOL_DEPENDENCIES) run in a later layer.
+    With result_cache (one dict per user turn), repeated read-only calls
+    reuse the first call's task instead of running again. Only successful
+    results stay cached, so a failed lookup can be retried on a later pass.
+    """
+    results: List[Any] = [None] * len(tool_calls)
+    for layer in _plan_tool_layers(tool_calls):
+        pending = []
+        cached_keys: Dict[int, Tuple[str, str]] = {}
+        for i in layer:
+            key = _read_only_call_key(tool_calls[i]) if result_cache is not None else None
+            if key is None:
+                pending.append(_run_swap_tool_call(tool_calls[i], account_id, retry_budget))
+                continue
+            if key not in result_cache:
+                result_cache[key] = asyncio.ensure_future(
+                    _run_swap_tool_call(tool_calls[i], account_id, retry_budget)
+                )
+            cached_keys[i] = key
+            pending.append(result_cache[key])
+        layer_results = await asyncio.gather(*pending, return_exceptions=True)
+        for i, res in zip(layer, layer_results):
+            if i in cached_keys and _tool_call_failed(res):
+                result_cache.pop(cached_keys[i], None)
+            if isinstance(res, BaseException):
+                res = (tool_calls[i]["name"], f"Error calling tool: {str(res)}", None, None)
+            results[i] = res
+    return results
+
+
+def _is_final_tool(tool_name: str) -> bool:
+    """True if the tool is tagged metadata["final"] (its output is the answer)."""
+    tool = TOOL_BY_NAME.get(tool_name)
+    return tool is not None and bool((tool.metadata or {}).get("final"))
+
+
+# Tool output longer than this is cut to its head and tail before it goes
+# back into the prompt (markers like [QUOTE_ID: sit at either end)
+TOOL_OUTPUT_CHAR_LIMIT = 3000
+
+
+def _clip_tool_output(tool_result: Any, limit: int = TOOL_OUTPUT_CHAR_LIMIT) -> str:
+    """Head + tail truncation of one tool output for the follow-up prompt."""
+    text = str(tool_result)
+    if len(text) <= limit:
+        return text
+    half = limit // 2
+    return f"{text[:half]}\n...[truncated {len(text) - 2 * half} chars]...\n{text[-half:]}"
+
+
+def _native_tool_messages(tool_calls: List[Dict[str, Any]], results: List[Tuple[str, str, Any, Any]]) -> List[ToolMessage]:
+    """Answer each tool call with a real ToolMessage (PROVIDER_NATIVE_TOOLS mode)."""
+    return [
+        ToolMessage(content=_clip_tool_output(tool_result), tool_call_id=tc["id"], name=tool_name)
+        for tc, (tool_name, tool_result, _payload, _artifact) in zip(tool_calls, results)
+    ]
+
+
+# Stand-in for the follow-up LLM reply once confirm_swap_tool has prepared the
+# transaction. The fixed "Transaction prepared" reply replaces it; this text
+# only shows if building the payload then fails.
+_TX_READY_RESPONSE = AIMessage(content="I had trouble preparing the transaction. Please try confirming again.")
+
+
+async def _transaction_ready(turn_flags: Dict[str, Any]) -> bool:
+    """True once a tool reported transaction_ready and a quote is stored."""
+    return bool(turn_flags.get("transaction_ready")) and await get_last_quote() is not None
+
+
 async def _process_swap_message(
     user_msg: str,
     session_state: Dict[str, Any],
@@ -194,61 +741,50 @@ async def _process_swap_message(
     """
     Process swap-related messages using the Swap Agent LLM.
     Handles token discovery, quotes, and transaction preparation.
+    
+    Prompt layout is cache-prefix-stable: [system][history][user msg + wallet],
+    and every follow-up call extends that exact list, so the provider can reuse
+    the prefix from the first call. Per-turn wallet data only ever sits at the tail.
     """
     account_id = user_context.get("account_id", "Not connected")
     
     # Ensure token cache is populated
     try:
-        from knowledge_base import _token_cache, get_available_tokens_from_api
-        if not _token_cache:
-            print("[SWAP AGENT] Populating token cache...")
-            await get_available_tokens_from_api()
+        await ensure_token_cache()
     except Exception as e:
-        print(f"[SWAP AGENT] Warning: Could not populate token cache: {e}")
+        logger.warning("[SWAP AGENT] Could not populate token cache: %s", e)
     
     # Process with LLM and tools
     try:
         # Convert history to LangChain messages
         history = user_context.get("history", [])
         
-        # Limit history to last 6 messages (3 exchanges) to avoid context issues
+        # Limit history to the last 3 whole exchanges within the token budget
         # Tool calling with long history can cause problems
-        recent_history = history[-6:] if len(history) > 6 else history
+        recent_history = select_rounds(history, max_rounds=3)
         
-        messages = [SystemMessage(content=SYSTEM_MESSAGE)]
+        messages = [SYSTEM_MSG, *_summary_messages(user_context)]
         
         # Add recent conversation history only
-        for msg in recent_history:
-            if msg["role"] == "user":
-                messages.append(HumanMessage(content=msg["content"]))
-            elif msg["role"] == "ai":
-                messages.append(AIMessage(content=msg["content"]))
+        messages.extend(_history_to_messages(recent_history))
         
         # Add current message with wallet context (multi-chain via HOT Kit)
         connected_chains = user_context.get("connected_chains", [])
         wallet_addresses = user_context.get("wallet_addresses", {})
         balances = user_context.get("balances", {})
         
-        wallet_info = f"[User wallet: {account_id}"
-        if connected_chains:
-            wallet_info += f" | connected_chains: [{', '.join(connected_chains)}]"
-        if wallet_addresses:
-            addr_parts = [f"{chain}: {addr}" for chain, addr in wallet_addresses.items()]
-            wallet_info += f" | addresses: {', '.join(addr_parts)}"
-        if balances:
-            bal_parts = [f"{chain}: {amt}" for chain, amt in balances.items()]
-            wallet_info += f" | balances: {', '.join(bal_parts)}"
-        wallet_info += "]"
+        # Built once per request and reused by every follow-up call
+        wallet_info = _format_wallet_block(account_id, connected_chains, wallet_addresses, balances)
         
         messages.append(HumanMessage(content=f"{user_msg}\n\n{wallet_info}"))
         
-        print(f"[AGENT] Sending {len(messages)} messages (including {len(recent_history)} recent history items)")
+        logger.debug("Sending %d messages (including %d recent history items)", len(messages), len(recent_history))
         
         # Call LLM
         try:
-            response = await llm_with_tools.ainvoke(messages)
+            response = await _ainvoke_llm(llm_with_tools, messages)
         except Exception as e:
-            print(f"[AGENT] Error: {str(e).encode('ascii', 'ignore').decode('ascii')}")
+            logger.error("Error: %s", str(e).encode('ascii', 'ignore').decode('ascii'))
             error_msg = str(e).lower()
             if "401" in error_msg or "unauthorized" in error_msg or "api key" in error_msg:
                 return {
@@ -262,127 +798,93 @@ async def _process_swap_message(
         
         # Initialize tool messages list (used by both branches)
         tool_messages = []
+        quote_found = False
+        # Structured flags from tool artifacts (quote_id, transaction_ready)
+        turn_flags: Dict[str, Any] = {}
         
         # Check if LLM wants to call tools
         if response.tool_calls:
-            print(f"[AGENT] LLM calling {len(response.tool_calls)} tool(s)")
+            logger.debug("LLM calling %d tool(s)", len(response.tool_calls))
             
-            # Execute each tool call
+            # Execute each tool call (one retry budget shared by every pass)
             transaction_prepared = False
             tx_payload = None
+            retry_budget = RetryBudget()
+            tool_result_cache: Dict[Tuple[str, str], Any] = {}
             
-            for tool_call in response.tool_calls:
-                tool_name = tool_call["name"]
-                tool_args = tool_call["args"]
-                
-                print(f"[AGENT] Calling tool: {tool_name} with args: {tool_args}")
-                
-                # Special handling for transaction preparation
-                if tool_name == "prepare_swap_transaction_tool":
+            results = await _run_swap_tool_calls(response.tool_calls, account_id, retry_budget, tool_result_cache)
+            
+            # Lookup tools with user-ready output: skip the follow-up LLM round trip
+            # (unless one failed: the follow-up pass phrases the error instead)
+            if (all(_is_final_tool(tc["name"]) for tc in response.tool_calls)
+                    and not any(_tool_call_failed(res) for res in results)):
+                logger.debug("Only final-answer tools called; returning their output directly")
+                return {
+                    "response": "\n\n".join(str(tool_result) for _name, tool_result, _payload, _artifact in results),
+                    "new_state": {"step": "IDLE"}
+                }
+            for tool_name, tool_result, payload, artifact in results:
+                if payload is not None:
                     transaction_prepared = True
-                    from tools import create_deposit_transaction
-                    try:
-                        tx_payload = create_deposit_transaction(
-                            token_in=tool_args["token_in"],
-                            token_out=tool_args["token_out"],
-                            amount=tool_args["amount"],
-                            min_amount_out=tool_args.get("min_amount_out", 0),
-                            deposit_address=tool_args["deposit_address"],
-                            source_chain=tool_args.get("source_chain", "near"),
-                            account_id=tool_args.get("account_id", account_id)
-                        )
-                        tool_result = "  Transaction prepared successfully and ready for user signature."
-                    except Exception as e:
-                        tool_result = f"  Error preparing transaction: {str(e)}"
-                        print(f"[AGENT] Transaction prep error: {e}")
-                else:
-                    # Find and execute the tool normally
-                    tool_result = None
-                    for tool in TOOL_LIST:
-                        if tool.name == tool_name:
-                            # Try up to 2 attempts (auto-retry on failure)
-                            for attempt in range(2):
-                                try:
-                                    print(f"[AGENT] Executing tool: {tool_name}" + (f" (retry)" if attempt > 0 else ""))
-                                    tool_result = await tool.ainvoke(tool_args)
-                                    print(f"[AGENT] Tool result: {tool_result[:200] if isinstance(tool_result, str) else tool_result}")
-                                    break  # Success, stop retrying
-                                except Exception as e:
-                                    print(f"[AGENT] ERROR in tool execution (attempt {attempt+1}): {e}")
-                                    if attempt == 0:
-                                        import asyncio
-                                        await asyncio.sleep(0.5)
-                                        continue  # Retry once
-                                    import traceback
-                                    traceback.print_exc()
-                                    tool_result = f"Error calling tool: {str(e)}"
-                            break
-                    
-                    if tool_result is None:
-                        tool_result = f"Tool {tool_name} not found"
-                        print(f"[AGENT] WARNING: {tool_result}")
+                    tx_payload = payload
+                if artifact:
+                    turn_flags.update(artifact)
                 
                 # Add tool result using HumanMessage (NEAR AI workaround)
                 # NEAR AI ignores ToolMessage content, so we use HumanMessage instead
                 tool_messages.append(HumanMessage(
-                    content=f"Tool '{tool_name}' returned:\n{tool_result}"
+                    content=f"Tool '{tool_name}' returned:\n{_clip_tool_output(tool_result)}"
                 ))
             
             # Get final response from LLM with tool results
-            print(f"[AGENT] Getting final response from LLM with {len(tool_messages)} tool results")
+            logger.debug("Getting final response from LLM with %d tool results", len(tool_messages))
             
             # Build the final message sequence for tool response
             # NEAR AI workaround: Do NOT include the AIMessage with tool_calls
             # (NEAR AI returns empty responses when it encounters tool_calls in AIMessage).
             # Instead, merge user query + tool results into a single HumanMessage
             # to avoid consecutive HumanMessages which also cause empty responses.
-            tool_response_messages = [SystemMessage(content=SYSTEM_MESSAGE)]
-            
-            # Include history
-            for msg in recent_history:
-                if msg["role"] == "user":
-                    tool_response_messages.append(HumanMessage(content=msg["content"]))
-                elif msg["role"] == "ai":
-                    tool_response_messages.append(AIMessage(content=msg["content"]))
-            
-            # Combine user message + tool results into ONE HumanMessage
-            # This avoids consecutive HumanMessages that confuse NEAR AI
-            # Use a bridge AIMessage to separate user query from tool results
-            # so the LLM understands: user asked -> I fetched data -> here it is
-            tool_results_text = "\n\n".join(
-                msg.content for msg in tool_messages
-            )
-            
-            # User's original question
-            connected_chains = user_context.get("connected_chains", [])
-            chains_str = ', '.join(connected_chains) if connected_chains else 'none'
-            tool_response_messages.append(HumanMessage(content=f"{user_msg}\n\n[User wallet: {account_id} | connected_chains: [{chains_str}]]"))
-            
-            # Bridge AIMessage: makes the LLM think it "decided" to fetch data
-            tool_names_called = ", ".join(tc["name"] for tc in response.tool_calls)
-            tool_response_messages.append(AIMessage(content=f"Let me look that up using {tool_names_called}."))
+            # Start from the exact messages of the first call (system, history and
+            # the user message with wallet context) so the prompt prefix is identical
+            tool_response_messages = list(messages)
             
-            # Tool results as a HumanMessage with clear instruction
-            tool_response_messages.append(HumanMessage(
-                content=(
-                    f"Here are the results:\n\n{tool_results_text}\n\n"
-                    f"Based on this data, take the NEXT action:\n"
-                    f"- If you now have enough info to swap (token, amount, chains confirmed), call `get_swap_quote_tool` NOW.\n"
-                    f"- If the user needs to choose or you need more info, respond with a question.\n"
-                    f"- NEVER respond with text saying 'Fetching quote...' or 'Let me get a quote' without ACTUALLY calling the tool.\n"
-                    f"- If a tool errored, try once more or explain the issue to the user."
+            if PROVIDER_SUPPORTS_TOOL_MESSAGES:
+                # Native mode: keep the model's own tool-call turn and answer it
+                tool_response_messages.append(response)
+                tool_response_messages.extend(_native_tool_messages(response.tool_calls, results))
+                tool_response_messages.append(HumanMessage(content=SWAP_NEXT_ACTION_INSTRUCTIONS))
+            else:
+                # Combine user message + tool results into ONE HumanMessage
+                # This avoids consecutive HumanMessages that confuse NEAR AI
+                # Use a bridge AIMessage to separate user query from tool results
+                # so the LLM understands: user asked -> I fetched data -> here it is
+                # dict.fromkeys drops repeated identical results, keeping order
+                tool_results_text = "\n\n".join(
+                    dict.fromkeys(msg.content for msg in tool_messages)
                 )
-            ))
+                
+                # Bridge AIMessage: makes the LLM think it "decided" to fetch data
+                tool_names_called = ", ".join(tc["name"] for tc in response.tool_calls)
+                tool_response_messages.append(AIMessage(content=f"Let me look that up using {tool_names_called}."))
+                
+                # Tool results as a HumanMessage with clear instruction
+                tool_response_messages.append(HumanMessage(
+                    content=f"Here are the results:\n\n{tool_results_text}\n\n{SWAP_NEXT_ACTION_INSTRUCTIONS}"
+                ))
             
             # Debug: Show message types being sent
-            msg_types = [f"{type(m).__name__}" for m in tool_response_messages]
-            print(f"[AGENT] Tool response sequence: {' -> '.join(msg_types)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Tool response sequence: %s", " -> ".join(type(m).__name__ for m in tool_response_messages))
             
-            print(f"[AGENT] Sending {len(tool_response_messages)} messages to LLM for final response")
-            print(f"[AGENT] Sending {len(tool_response_messages)} messages to LLM for final response")
+            logger.debug("Sending %d messages to LLM for final response", len(tool_response_messages))
             
-            # Enable tools for this response too, to allow multi-step flows (Check Chains -> Get Quote)
-            final_response = await llm_with_tools.ainvoke(tool_response_messages)
+            if await _transaction_ready(turn_flags):
+                # The reply is fixed from here on: skip the follow-up LLM call
+                logger.debug("Transaction ready after pass 1; skipping follow-up LLM call")
+                final_response = _TX_READY_RESPONSE
+            else:
+                # Enable tools for this response too, to allow multi-step flows (Check Chains -> Get Quote)
+                final_response = await _ainvoke_llm(llm_with_tools, tool_response_messages)
             
             # Handle multi-step tool chains (e.g. Get Chains -> Get Quote -> Confirm)
             # Loop up to 3 more passes so tools can chain together in one user message
@@ -390,125 +892,89 @@ async def _process_swap_message(
             MAX_TOOL_PASSES = 3
             while final_response.tool_calls and pass_count <= MAX_TOOL_PASSES:
                 pass_count += 1
-                print(f"[AGENT] Pass {pass_count} tool calling: {len(final_response.tool_calls)} tool(s)")
+                logger.debug("Pass %d tool calling: %d tool(s)", pass_count, len(final_response.tool_calls))
                 
                 # Do NOT re-append the AIMessage with tool_calls (NEAR AI workaround)
                 # Just process the tools and append results
                 
-                for tool_call in final_response.tool_calls:
-                    tool_name = tool_call["name"]
-                    tool_args = tool_call["args"]
-                    print(f"[AGENT] Calling tool (Pass {pass_count}): {tool_name}")
-                    
-                    tool_result = None
-                    
-                    # Special handling for transaction preparation
-                    if tool_name == "prepare_swap_transaction_tool":
+                results = await _run_swap_tool_calls(final_response.tool_calls, account_id, retry_budget, tool_result_cache)
+                if PROVIDER_SUPPORTS_TOOL_MESSAGES:
+                    tool_response_messages.append(final_response)
+                    tool_response_messages.extend(_native_tool_messages(final_response.tool_calls, results))
+                
+                for tool_name, tool_result, payload, artifact in results:
+                    if payload is not None:
                         transaction_prepared = True
-                        from tools import create_deposit_transaction
-                        try:
-                            tx_payload = create_deposit_transaction(
-                                token_in=tool_args["token_in"],
-                                token_out=tool_args["token_out"],
-                                amount=tool_args["amount"],
-                                min_amount_out=tool_args.get("min_amount_out", 0),
-                                deposit_address=tool_args["deposit_address"],
-                                source_chain=tool_args.get("source_chain", "near"),
-                                account_id=tool_args.get("account_id", account_id)
-                            )
-                            tool_result = "  Transaction prepared successfully and ready for user signature."
-                        except Exception as e:
-                            tool_result = f"  Error preparing transaction: {str(e)}"
-                            
-                    else:
-                        # Standard tools   with 1 retry on failure
-                        for attempt in range(2):
-                            found = False
-                            for tool in TOOL_LIST:
-                                if tool.name == tool_name:
-                                    try:
-                                        tool_result = await tool.ainvoke(tool_args)
-                                        found = True
-                                    except Exception as e:
-                                        print(f"[AGENT] Tool {tool_name} failed (attempt {attempt+1}): {e}")
-                                        tool_result = f"Error: {str(e)}"
-                                        if attempt == 0:
-                                            print(f"[AGENT] Retrying {tool_name}...")
-                                            import asyncio
-                                            await asyncio.sleep(0.5)
-                                            continue
-                                    break
-                            if found or attempt == 1:
-                                break
-                        if tool_result is None:
-                             tool_result = f"Tool {tool_name} not found"
+                        tx_payload = payload
+                    if artifact:
+                        turn_flags.update(artifact)
                          
                     # Append result to prompt
-                    tool_msg = HumanMessage(content=f"Tool '{tool_name}' returned:\n{tool_result}")
-                    tool_response_messages.append(tool_msg)
+                    tool_msg = HumanMessage(content=f"Tool '{tool_name}' returned:\n{_clip_tool_output(tool_result)}")
+                    if not PROVIDER_SUPPORTS_TOOL_MESSAGES:
+                        tool_response_messages.append(tool_msg)
                     
                     # CRITICAL: Append to tool_messages so downstream logic (state transitions) sees it
                     tool_messages.append(tool_msg)
 
+                if await _transaction_ready(turn_flags):
+                    logger.debug("Transaction ready after pass %d; skipping follow-up LLM call", pass_count)
+                    final_response = _TX_READY_RESPONSE
+                    break
+
                 # Get next response   allow tools on intermediate passes, no tools on final pass
                 if pass_count < MAX_TOOL_PASSES:
-                    print(f"[AGENT] Getting response after Pass {pass_count} (tools enabled)")
-                    final_response = await llm_with_tools.ainvoke(tool_response_messages)
+                    logger.debug("Getting response after Pass %d (tools enabled)", pass_count)
+                    final_response = await _ainvoke_llm(llm_with_tools, tool_response_messages)
                 else:
-                    print(f"[AGENT] Getting final response after Pass {pass_count} (no tools, prevent loops)")
-                    final_response = await llm.ainvoke(tool_response_messages)
+                    logger.debug("Getting final response after Pass %d (no tools, prevent loops)", pass_count)
+                    final_response = await _ainvoke_llm(llm, tool_response_messages)
 
-            print(f"[AGENT] LLM raw response type: {type(final_response)}")
-            print(f"[AGENT] LLM response content: {final_response.content if hasattr(final_response, 'content') else final_response}")
+            logger.debug("LLM raw response type: %s", type(final_response))
+            logger.debug("LLM response content: %s", getattr(final_response, "content", final_response))
             
             response_text = final_response.content if hasattr(final_response, 'content') else str(final_response)
             
             if not response_text or response_text.strip() == "":
-                print("[AGENT] WARNING: Empty response from LLM!")
+                logger.warning("Empty response from LLM!")
                 response_text = "I apologize, I encountered an issue generating a response. Could you please rephrase your request?"
             
-            print(f"[AGENT] Final response ({len(response_text)} chars): {response_text[:200]}")
+            logger.debug("Final response (%d chars): %s", len(response_text), response_text[:200])
             
-            # Check if transaction was prepared by confirm_swap_tool
-            transaction_prepared = False
-            for msg in tool_messages:
-                if hasattr(msg, 'content') and '[TRANSACTION_READY]' in msg.content:
-                    transaction_prepared = True
-                    break
+            # Check if transaction was prepared by confirm_swap_tool / a quote was given
+            transaction_prepared = bool(turn_flags.get("transaction_ready"))
+            quote_found = "quote_id" in turn_flags
             
             if transaction_prepared:
                 # Get the actual transaction payload
-                from agent_tools import _last_quote
-                if _last_quote:
+                last_quote = await get_last_quote()
+                if last_quote:
                     try:
-                        from tools import create_deposit_transaction, get_sign_action_type
-                        
-                        source_chain = _last_quote.get("source_chain", "near").lower()
+                        source_chain = last_quote.get("source_chain", "near").lower()
                         
                         # Resolve the correct sender address for the source chain
-                        sender_address = _last_quote.get("account_id", account_id)
-                        wallet_addresses = user_context.get("wallet_addresses", {})
+                        sender_address = last_quote.get("account_id", account_id)
                         if isinstance(wallet_addresses, dict):
                             # Try to find the right address for this chain
-                            from tools import is_evm_chain
                             if is_evm_chain(source_chain):
                                 sender_address = wallet_addresses.get("eth", wallet_addresses.get(source_chain, sender_address))
                             else:
                                 sender_address = wallet_addresses.get(source_chain, sender_address)
                         
                         tx_payload = create_deposit_transaction(
-                            token_in=_last_quote["token_in"],
-                            token_out=_last_quote["token_out"],
-                            amount=_last_quote["amount"],
-                            min_amount_out=_last_quote.get("min_amount_out", 0),
-                            deposit_address=_last_quote["deposit_address"],
+                            token_in=last_quote["token_in"],
+                            token_out=last_quote["token_out"],
+                            amount=last_quote["amount"],
+                            min_amount_out=last_quote.get("min_amount_out", 0),
+                            deposit_address=last_quote["deposit_address"],
                             source_chain=source_chain,
                             account_id=sender_address
                         )
                         action_type = get_sign_action_type(source_chain)
                         
-                        print(f"[AGENT] Transaction prepared for {source_chain} | Action: {action_type}")
-                        print(f"[AGENT] Transaction payload: {json.dumps(tx_payload, indent=2)}")
+                        logger.info("Transaction prepared for %s | Action: %s", source_chain, action_type)
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("Transaction payload: %s", json.dumps(tx_payload, indent=2))
                         return {
                             "response": f"  Transaction prepared for {source_chain.upper()}! Please review and sign it in your wallet.",
                             "action": action_type,
@@ -516,28 +982,24 @@ async def _process_swap_message(
                             "new_state": {"step": "IDLE"}
                         }
                     except Exception as e:
-                        print(f"[AGENT] Error creating transaction payload: {e}")
-                        import traceback
-                        traceback.print_exc()
+                        logger.exception("Error creating transaction payload: %s", e)
         else:
             # No tools needed, use direct response
             response_text = response.content
-            print(f"[AGENT] Direct response (no tools): {response_text[:200]}")
+            logger.debug("Direct response (no tools): %s", response_text[:200])
         
         # Determine new state based on tool results
         new_state = {"step": "IDLE"}
         
         # Check if a quote was just provided   transition to WAITING_CONFIRMATION
-        for msg in tool_messages:
-            if hasattr(msg, 'content') and '[QUOTE_ID:' in msg.content:
-                from agent_tools import _last_quote
-                if _last_quote:
-                    new_state = {
-                        "step": "WAITING_CONFIRMATION",
-                        "pending_quote": _last_quote.copy()
-                    }
-                    print(f"[AGENT] State -> WAITING_CONFIRMATION (quote stored)")
-                break
+        if quote_found:
+            last_quote = await get_last_quote()
+            if last_quote:
+                new_state = {
+                    "step": "WAITING_CONFIRMATION",
+                    "pending_quote": last_quote.copy()
+                }
+                logger.info("State -> WAITING_CONFIRMATION (quote stored)")
         
         return {
             "response": response_text,
@@ -545,9 +1007,7 @@ async def _process_swap_message(
         }
         
     except Exception as e:
-        print(f"[AGENT] Error: {str(e).encode('ascii', 'ignore').decode('ascii')}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error: %s", str(e).encode('ascii', 'ignore').decode('ascii'))
         return {
             "response": "I encountered an error processing your request. Could you try rephrasing?",
             "new_state": {"step": "IDLE"}
@@ -567,33 +1027,28 @@ async def _process_autonomy_message(
     Separate prompt, tools, and LLM binding   no swap logic.
     """
     account_id = user_context.get("account_id", "Not connected")
-    print(f"[AUTONOMY AGENT] Processing: {user_msg} | Account: {account_id}")
+    logger.info("[AUTONOMY AGENT] Processing: %s | Account: %s", user_msg, account_id)
 
     try:
         history = user_context.get("history", [])
-        recent_history = history[-4:] if len(history) > 4 else history
-
-        messages = [SystemMessage(content=AUTONOMY_SYSTEM_PROMPT)]
+        recent_history = select_rounds(history, max_rounds=2)
 
-        for msg in recent_history:
-            if msg["role"] == "user":
-                messages.append(HumanMessage(content=msg["content"]))
-            elif msg["role"] == "ai":
-                messages.append(AIMessage(content=msg["content"]))
+        messages = [AUTONOMY_SYSTEM_MSG, *_summary_messages(user_context)]
+        messages.extend(_history_to_messages(recent_history))
 
         messages.append(HumanMessage(
             content=f"{user_msg}\n\n[Wallet: {account_id}]"
         ))
 
-        print(f"[AUTONOMY AGENT] Sending {len(messages)} messages to LLM")
+        logger.debug("[AUTONOMY AGENT] Sending %d messages to LLM", len(messages))
 
         # Call LLM with ONLY autonomy tools
-        response = await llm_with_autonomy_tools.ainvoke(messages)
+        response = await _ainvoke_llm(llm_with_autonomy_tools, messages)
 
         # No tool calls   direct response
         if not response.tool_calls:
             response_text = response.content if hasattr(response, 'content') else str(response)
-            print(f"[AUTONOMY AGENT] Direct response: {response_text[:200]}")
+            logger.debug("[AUTONOMY AGENT] Direct response: %s", response_text[:200])
             return {
                 "response": response_text or "I can help with strategies, guardrails, and autonomy settings. What would you like to configure?",
                 "new_state": {"step": "IDLE"}
@@ -601,48 +1056,33 @@ async def _process_autonomy_message(
 
         # Process tool calls
         tool_messages = []
+        retry_budget = RetryBudget()
         for tool_call in response.tool_calls:
             tool_name = tool_call["name"]
             tool_args = tool_call["args"]
-            print(f"[AUTONOMY AGENT] Calling tool: {tool_name} with args: {tool_args}")
+            logger.debug("[AUTONOMY AGENT] Calling tool: %s with args: %s", tool_name, tool_args)
 
             tool_result = None
-            for tool in AUTONOMY_TOOL_LIST:
-                if tool.name == tool_name:
-                    for attempt in range(2):
-                        try:
-                            tool_result = await tool.ainvoke(tool_args)
-                            print(f"[AUTONOMY AGENT] Tool result: {str(tool_result)[:200]}")
-                            break
-                        except Exception as e:
-                            print(f"[AUTONOMY AGENT] Tool error (attempt {attempt+1}): {e}")
-                            if attempt == 0:
-                                import asyncio
-                                await asyncio.sleep(0.5)
-                            else:
-                                tool_result = f"Error: {str(e)}"
-                    break
+            tool = AUTONOMY_TOOL_BY_NAME.get(tool_name)
+            if tool is not None:
+                try:
+                    tool_result = await _invoke_with_retry(tool, tool_args, retry_budget, "[AUTONOMY AGENT]")
+                    logger.debug("[AUTONOMY AGENT] Tool result: %.200s", tool_result)
+                except Exception as e:
+                    tool_result = f"Error: {str(e)}"
 
             if tool_result is None:
                 tool_result = f"Tool {tool_name} not found"
 
             tool_messages.append(HumanMessage(
-                content=f"Tool '{tool_name}' returned:\n{tool_result}"
+                content=f"Tool '{tool_name}' returned:\n{_clip_tool_output(tool_result)}"
             ))
 
         # Get final response with tool results
-        tool_results_text = "\n\n".join(msg.content for msg in tool_messages)
-
-        final_messages = [SystemMessage(content=AUTONOMY_SYSTEM_PROMPT)]
-        for msg in recent_history:
-            if msg["role"] == "user":
-                final_messages.append(HumanMessage(content=msg["content"]))
-            elif msg["role"] == "ai":
-                final_messages.append(AIMessage(content=msg["content"]))
+        tool_results_text = "\n\n".join(dict.fromkeys(msg.content for msg in tool_messages))
 
-        final_messages.append(HumanMessage(
-            content=f"{user_msg}\n\n[Wallet: {account_id}]"
-        ))
+        # Reuse the first call's messages so the prompt prefix is identical
+        final_messages = list(messages)
 
         tool_names_called = ", ".join(tc["name"] for tc in response.tool_calls)
         final_messages.append(AIMessage(content=f"Let me check using {tool_names_called}."))
@@ -653,35 +1093,34 @@ async def _process_autonomy_message(
         )))
 
         # Allow one more tool pass, then text-only response
-        final_response = await llm_with_autonomy_tools.ainvoke(final_messages)
+        final_response = await _ainvoke_llm(llm_with_autonomy_tools, final_messages)
 
         if final_response.tool_calls:
             for tool_call in final_response.tool_calls:
                 tool_name = tool_call["name"]
                 tool_args = tool_call["args"]
-                print(f"[AUTONOMY AGENT] Pass 2: {tool_name}")
+                logger.debug("[AUTONOMY AGENT] Pass 2: %s", tool_name)
 
                 tool_result = None
-                for tool in AUTONOMY_TOOL_LIST:
-                    if tool.name == tool_name:
-                        try:
-                            tool_result = await tool.ainvoke(tool_args)
-                        except Exception as e:
-                            tool_result = f"Error: {str(e)}"
-                        break
+                tool = AUTONOMY_TOOL_BY_NAME.get(tool_name)
+                if tool is not None:
+                    try:
+                        tool_result = await _invoke_with_retry(tool, tool_args, retry_budget, "[AUTONOMY AGENT]")
+                    except Exception as e:
+                        tool_result = f"Error: {str(e)}"
 
                 final_messages.append(HumanMessage(
-                    content=f"Tool '{tool_name}' returned:\n{tool_result}"
+                    content=f"Tool '{tool_name}' returned:\n{_clip_tool_output(tool_result)}"
                 ))
 
-            final_response = await llm.ainvoke(final_messages)
+            final_response = await _ainvoke_llm(llm, final_messages)
 
         response_text = final_response.content if hasattr(final_response, 'content') else str(final_response)
 
         if not response_text or response_text.strip() == "":
             response_text = "Settings updated. Check the Autonomy panel in the sidebar for details."
 
-        print(f"[AUTONOMY AGENT] Final response: {response_text[:200]}")
+        logger.debug("[AUTONOMY AGENT] Final response: %s", response_text[:200])
 
         return {
             "response": response_text,
@@ -689,9 +1128,7 @@ async def _process_autonomy_message(
         }
 
     except Exception as e:
-        print(f"[AUTONOMY AGENT] Error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[AUTONOMY AGENT] Error: %s", e)
         return {
             "response": "I hit an issue processing your autonomy request. Could you try again?",
             "new_state": {"step": "IDLE"}
@@ -710,6 +1147,56 @@ FLOW_SYSTEM_MSG = FLOW_SYSTEM_PROMPT + """
 - flow_get_user_nfts_tool -> List user's NFTs on Flow
 - flow_transfer_nft_tool -> Transfer an NFT to another Flow address
 """
+FLOW_SYSTEM_MSG_OBJ = SystemMessage(content=FLOW_SYSTEM_MSG)
+
+# Instructions appended after tool results on the Flow agent's follow-up call
+FLOW_NEXT_ACTION_INSTRUCTIONS = (
+    "Based on this data, take the NEXT action:\n"
+    "- If you have a quote and user confirmed, call `flow_confirm_swap_tool` NOW.\n"
+    "- If you need to list NFTs before a transfer, call `flow_get_user_nfts_tool`.\n"
+    "- Otherwise respond to the user with the results."
+)
+
+
+# flow_confirm_swap_tool reads the quote flow_get_swap_quote_tool stores
+FLOW_TOOL_DEPENDENCIES = {
+    "flow_confirm_swap_tool": frozenset({"flow_get_swap_quote_tool"}),
+}
+
+
+async def _run_flow_tool_call(tool_call: Dict[str, Any], retry_budget: RetryBudget) -> Tuple[str, Any]:
+    """Execute one Flow tool call, returning (tool_name, tool_result)."""
+    tool_name = tool_call["name"]
+    logger.debug("[FLOW AGENT] Calling tool: %s", tool_name)
+
+    tool = FLOW_TOOL_BY_NAME.get(tool_name)
+    if tool is None:
+        return tool_name, f"Tool {tool_name} not found"
+    try:
+        return tool_name, await _invoke_with_retry(tool, tool_call["args"], retry_budget, "[FLOW AGENT]")
+    except Exception as e:
+        return tool_name, f"Error: {str(e)}"
+
+
+async def _run_flow_tool_calls(
+    tool_calls: List[Dict[str, Any]],
+    retry_budget: RetryBudget
+) -> List[HumanMessage]:
+    """
+    Execute one turn's Flow tool calls (independent ones concurrently) and
+    return their results as HumanMessages in call order.
+    """
+    results: List[Any] = [None] * len(tool_calls)
+    for layer in _plan_tool_layers(tool_calls, FLOW_TOOL_DEPENDENCIES):
+        layer_results = await asyncio.gather(
+            *(_run_flow_tool_call(tool_calls[i], retry_budget) for i in layer)
+        )
+        for i, res in zip(layer, layer_results):
+            results[i] = res
+    return [
+        HumanMessage(content=f"Tool '{tool_name}' returned:\n{tool_result}")
+        for tool_name, tool_result in results
+    ]
 
 
 async def _process_flow_message(
@@ -724,121 +1211,67 @@ async def _process_flow_message(
     account_id = user_context.get("account_id", "Not connected")
     flow_balance = user_context.get("flow_balance", "unknown")
 
-    print(f"[FLOW AGENT] Processing: {user_msg} | Account: {account_id}")
+    logger.info("[FLOW AGENT] Processing: %s | Account: %s", user_msg, account_id)
 
     try:
         # Build message sequence
         messages = [
-            SystemMessage(content=FLOW_SYSTEM_MSG),
+            FLOW_SYSTEM_MSG_OBJ,
+            *_summary_messages(user_context),
             HumanMessage(content=f"{user_msg}\n\n[Flow wallet: {account_id} | balance: {flow_balance} FLOW]")
         ]
 
         # Include recent history
         recent_history = user_context.get("recent_history", [])
         if recent_history:
-            history_messages = [SystemMessage(content=FLOW_SYSTEM_MSG)]
-            for msg in recent_history[-4:]:
-                if msg["role"] == "user":
-                    history_messages.append(HumanMessage(content=msg["content"]))
-                elif msg["role"] == "ai":
-                    history_messages.append(AIMessage(content=msg["content"]))
+            history_messages = [FLOW_SYSTEM_MSG_OBJ, *_summary_messages(user_context)]
+            history_messages.extend(_history_to_messages(select_rounds(recent_history, max_rounds=2)))
             history_messages.append(HumanMessage(
                 content=f"{user_msg}\n\n[Flow wallet: {account_id} | balance: {flow_balance} FLOW]"
             ))
             messages = history_messages
 
-        print(f"[FLOW AGENT] Sending {len(messages)} messages to LLM")
+        logger.debug("[FLOW AGENT] Sending %d messages to LLM", len(messages))
 
         # Call LLM with Flow tools
-        response = await llm_with_flow_tools.ainvoke(messages)
+        response = await _ainvoke_llm(llm_with_flow_tools, messages)
 
         # No tool calls   direct response
         if not response.tool_calls:
             response_text = response.content if hasattr(response, 'content') else str(response)
-            print(f"[FLOW AGENT] Direct response: {response_text[:200]}")
+            logger.debug("[FLOW AGENT] Direct response: %s", response_text[:200])
             return {
                 "response": response_text or "I'm here to help with Flow swaps and NFTs. What would you like to do?",
                 "new_state": {"step": "IDLE"}
             }
 
         # Process tool calls (same multi-pass pattern as NEAR agent)
-        tool_messages = []
-        for tool_call in response.tool_calls:
-            tool_name = tool_call["name"]
-            tool_args = tool_call["args"]
-            print(f"[FLOW AGENT] Calling tool: {tool_name}")
-
-            tool_result = None
-            for tool in FLOW_TOOL_LIST:
-                if tool.name == tool_name:
-                    for attempt in range(2):
-                        try:
-                            print(f"[FLOW AGENT] Executing: {tool_name}" + (" (retry)" if attempt > 0 else ""))
-                            tool_result = await tool.ainvoke(tool_args)
-                            break
-                        except Exception as e:
-                            print(f"[FLOW AGENT] Tool error (attempt {attempt+1}): {e}")
-                            if attempt == 0:
-                                import asyncio
-                                await asyncio.sleep(0.5)
-                            else:
-                                tool_result = f"Error: {str(e)}"
-                    break
-
-            if tool_result is None:
-                tool_result = f"Tool {tool_name} not found"
-
-            tool_messages.append(HumanMessage(content=f"Tool '{tool_name}' returned:\n{tool_result}"))
+        retry_budget = RetryBudget()
+        tool_messages = await _run_flow_tool_calls(response.tool_calls, retry_budget)
 
         # Build response with tool results
-        tool_results_text = "\n\n".join(msg.content for msg in tool_messages)
-        tool_response_messages = [SystemMessage(content=FLOW_SYSTEM_MSG)]
-
-        for msg in recent_history[-4:]:
-            if msg["role"] == "user":
-                tool_response_messages.append(HumanMessage(content=msg["content"]))
-            elif msg["role"] == "ai":
-                tool_response_messages.append(AIMessage(content=msg["content"]))
-
-        tool_response_messages.append(HumanMessage(
-            content=f"{user_msg}\n\n[Flow wallet: {account_id} | balance: {flow_balance} FLOW]"
-        ))
+        tool_results_text = "\n\n".join(dict.fromkeys(msg.content for msg in tool_messages))
+        # Reuse the first call's messages so the prompt prefix is identical
+        tool_response_messages = list(messages)
 
         tool_names_called = ", ".join(tc["name"] for tc in response.tool_calls)
         tool_response_messages.append(AIMessage(content=f"Let me look that up using {tool_names_called}."))
 
-        tool_response_messages.append(HumanMessage(content=(
-            f"Here are the results:\n\n{tool_results_text}\n\n"
-            f"Based on this data, take the NEXT action:\n"
-            f"- If you have a quote and user confirmed, call `flow_confirm_swap_tool` NOW.\n"
-            f"- If you need to list NFTs before a transfer, call `flow_get_user_nfts_tool`.\n"
-            f"- Otherwise respond to the user with the results."
-        )))
+        tool_response_messages.append(HumanMessage(
+            content=f"Here are the results:\n\n{tool_results_text}\n\n{FLOW_NEXT_ACTION_INSTRUCTIONS}"
+        ))
 
         # Get final response (allow 1 more tool pass)
-        final_response = await llm_with_flow_tools.ainvoke(tool_response_messages)
+        final_response = await _ainvoke_llm(llm_with_flow_tools, tool_response_messages)
 
         # Handle second-pass tool calls
         if final_response.tool_calls:
-            for tool_call in final_response.tool_calls:
-                tool_name = tool_call["name"]
-                tool_args = tool_call["args"]
-                print(f"[FLOW AGENT] Pass 2 tool: {tool_name}")
-
-                tool_result = None
-                for tool in FLOW_TOOL_LIST:
-                    if tool.name == tool_name:
-                        try:
-                            tool_result = await tool.ainvoke(tool_args)
-                        except Exception as e:
-                            tool_result = f"Error: {str(e)}"
-                        break
+            logger.debug("[FLOW AGENT] Pass 2: %d tool(s)", len(final_response.tool_calls))
+            pass2_messages = await _run_flow_tool_calls(final_response.tool_calls, retry_budget)
+            tool_response_messages.extend(pass2_messages)
+            tool_messages.extend(pass2_messages)
 
-                tool_msg = HumanMessage(content=f"Tool '{tool_name}' returned:\n{tool_result}")
-                tool_response_messages.append(tool_msg)
-                tool_messages.append(tool_msg)
-
-            final_response = await llm.ainvoke(tool_response_messages)
+            final_response = await _ainvoke_llm(llm, tool_response_messages)
 
         response_text = final_response.content if hasattr(final_response, 'content') else str(final_response)
 
@@ -852,11 +1285,10 @@ async def _process_flow_message(
         for msg in tool_messages:
             content = msg.content if hasattr(msg, 'content') else str(msg)
             if '[TRANSACTION_READY]' in content:
-                from flow_agent_tools import _flow_last_quote
-                if _flow_last_quote:
-                    from flow_tools import flow_build_swap_transaction
+                flow_last_quote = await get_flow_last_quote()
+                if flow_last_quote:
                     payload = flow_build_swap_transaction(
-                        quote=_flow_last_quote,
+                        quote=flow_last_quote,
                         from_address=account_id
                     )
                     action = "SIGN_FLOW_TRANSACTION"
@@ -879,13 +1311,8 @@ async def _process_flow_message(
         return result
 
     except Exception as e:
-        print(f"[FLOW AGENT] Error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[FLOW AGENT] Error: %s", e)
         return {
             "response": "I encountered an error processing your Flow request. Could you try again?",
             "new_state": {"step": "IDLE"}
         }
-
-# Import asyncio for async tool execution
-import asyncio
@@ -0,0 +1,59 @@
+"""
+Context window budgeting for replayed chat history.
+Counts tokens with tiktoken once its encoding is loaded (warm_encoder() at
+startup); until then, or without tiktoken, falls back to len(text) // 4.
+"""
+
+import logging
+from typing import Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+
+# History token budget per model, before the safety buffer
+MODEL_HISTORY_BUDGETS = {
+    "openai/gpt-oss-120b": 3000,
+}
+DEFAULT_HISTORY_BUDGET = 3000
+SAFETY_BUFFER = 0.10
+
+# gpt-oss uses the o200k tokenizer family (same as gpt-4o / gpt-4o-mini)
+ENCODING_NAME = "o200k_base"
+
+_encoder: Optional[object] = None
+
+
+def warm_encoder() -> bool:
+    """
+    Load the tiktoken encoding. The first load may download the BPE file,
+    so call this off the event loop (e.g. asyncio.to_thread) at startup.
+    Returns True when exact counting is available.
+    """
+    global _encoder
+    if _encoder is None and tiktoken is not None:
+        try:
+            _encoder = tiktoken.get_encoding(ENCODING_NAME)
+        except Exception as e:
+            logger.warning("[CONTEXT] tiktoken encoding unavailable, estimating tokens: %s", e)
+    return _encoder is not None
+
+
+def count_tokens(text: str) -> int:
+    """Token count of text (exact with tiktoken, else len // 4)."""
+    if not text:
+        return 0
+    if _encoder is not None:
+        return len(_encoder.encode(text, disallowed_special=()))
+    return len(text) // 4
+
+
+def history_budget(model: str) -> int:
+    """History token budget for model, with the safety buffer applied."""
+    budget = MODEL_HISTORY_BUDGETS.get(model, DEFAULT_HISTORY_BUDGET)
+    return int(budget * (1 - SAFETY_BUFFER))
+
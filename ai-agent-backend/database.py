@@ -91,6 +91,13 @@ def init_db():
             tx_hash TEXT DEFAULT '',
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
+
+        -- Latest swap quote per chat session (awaiting user confirmation)
+        CREATE TABLE IF NOT EXISTS pending_quotes (
+            session_id TEXT PRIMARY KEY,
+            quote_data TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
     """);
 
     conn.commit()
@@ -329,6 +336,32 @@ def get_latest_snapshot(user_wallet: str) -> Optional[Dict[str, Any]]:
     return None
 
 
+# -- Pending Swap Quotes ------------------------------------------
+
+def save_pending_quote(session_id: str, quote: Dict[str, Any]):
+    """Store the latest quote for a chat session (replaces any previous one)."""
+    conn = get_connection()
+    conn.execute(
+        "INSERT OR REPLACE INTO pending_quotes (session_id, quote_data, created_at) "
+        "VALUES (?, ?, CURRENT_TIMESTAMP)",
+        (session_id, json.dumps(quote))
+    )
+    conn.commit()
+    conn.close()
+
+
+def get_pending_quote(session_id: str, max_age_seconds: int = 300) -> Optional[Dict[str, Any]]:
+    """Get the latest quote for a chat session, or None if missing/expired."""
+    conn = get_connection()
+    row = conn.execute(
+        "SELECT quote_data FROM pending_quotes WHERE session_id = ? "
+        "AND created_at >= datetime('now', ?)",
+        (session_id, f"-{int(max_age_seconds)} seconds")
+    ).fetchone()
+    conn.close()
+    return json.loads(row['quote_data']) if row else None
+
+
 # -- Kill Switch --------------------------------------------------
 
 def activate_kill_switch(user_wallet: str):
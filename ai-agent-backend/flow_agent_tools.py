@@ -3,11 +3,42 @@ LangChain tool definitions for Flow blockchain operations.
 These wrap functions from flow_tools.py and are used exclusively
 when the user connects via Flow Wallet / Dapper Wallet.
 """
+import asyncio
+import logging
 from langchain.tools import tool
-from typing import Optional
+from typing import Optional, Dict, Any
 
-# Global quote storage for Flow swaps (same pattern as NEAR agent)
-_flow_last_quote = None
+from agent_tools import current_session_id, NO_SESSION_ID, QUOTE_TTL
+from database import get_pending_quote, save_pending_quote
+
+logger = logging.getLogger(__name__)
+
+
+# Flow quotes share the pending_quotes table with NEAR quotes (so a confirm
+# handled by another worker still finds them), under their own key
+def _flow_quote_key() -> Optional[str]:
+    """pending_quotes key for the current chat session, None without a session."""
+    session_id = current_session_id.get()
+    if session_id == NO_SESSION_ID:
+        return None
+    return f"flow:{session_id}"
+
+
+async def get_flow_last_quote() -> Optional[Dict[str, Any]]:
+    """Get the current chat session's unexpired Flow quote."""
+    key = _flow_quote_key()
+    if key is None:
+        return None
+    return await asyncio.to_thread(get_pending_quote, key, QUOTE_TTL)
+
+
+async def _set_flow_last_quote(quote: Dict[str, Any]) -> None:
+    """Store a Flow quote for the current chat session (needs a session id)."""
+    key = _flow_quote_key()
+    if key is None:
+        logger.warning("[FLOW] No chat session; quote not stored for confirmation")
+        return
+    await asyncio.to_thread(save_pending_quote, key, quote)
 
 
 @tool
@@ -44,8 +75,6 @@ async def flow_get_swap_quote_tool(
     """
     from flow_tools import flow_get_swap_quote
 
-    global _flow_last_quote
-
     quote = await flow_get_swap_quote(
         token_in=token_in,
         token_out=token_out,
@@ -56,7 +85,7 @@ async def flow_get_swap_quote_tool(
     if "error" in quote:
         return f"  Error getting quote: {quote['error']}"
 
-    _flow_last_quote = quote
+    await _set_flow_last_quote(quote)
 
     return (
         f"  **Flow Swap Quote**\n"
@@ -81,23 +110,22 @@ async def flow_confirm_swap_tool() -> str:
     """
     from flow_tools import flow_build_swap_transaction
 
-    global _flow_last_quote
-
-    if not _flow_last_quote:
+    flow_last_quote = await get_flow_last_quote()
+    if not flow_last_quote:
         return "  No active swap quote found. Please request a quote first."
 
     try:
-        from_address = _flow_last_quote.get("account_address", "")
+        from_address = flow_last_quote.get("account_address", "")
         tx_payload = flow_build_swap_transaction(
-            quote=_flow_last_quote,
+            quote=flow_last_quote,
             from_address=from_address,
             slippage=0.01
         )
 
         result = (
             f"  Swap transaction prepared!\n"
-            f"**Swapping**: {_flow_last_quote['amount_in']} {_flow_last_quote['token_in']}   "
-            f"~{_flow_last_quote['amount_out']:.6f} {_flow_last_quote['token_out']}\n"
+            f"**Swapping**: {flow_last_quote['amount_in']} {flow_last_quote['token_in']}   "
+            f"~{flow_last_quote['amount_out']:.6f} {flow_last_quote['token_out']}\n"
             f"**Chain**: Flow EVM (chainId: 747)\n\n"
             f"Please review and sign the transaction in your wallet.\n\n"
             f"[TRANSACTION_READY]"
@@ -4,7 +4,7 @@ All swap logic uses Flow EVM (chainId 747, Uniswap V2/V3 fork).
 """
 from typing import Dict, List, Any, Optional
 from decimal import Decimal
-import httpx
+from http_client import api_http_client
 import json
 
 #  
@@ -206,14 +206,13 @@ async def flow_get_user_nfts(account_address: str) -> List[Dict]:
     # Use Alchemy Flow API or direct Cadence script execution
     # For now, use the Flow REST API to query account storage
     try:
-        async with httpx.AsyncClient() as client:
-            # Query account storage paths for NFT collections
-            response = await client.get(
-                f"{FLOW_ACCESS_NODE}/v1/accounts/{account_address}",
-                timeout=10.0
-            )
-            response.raise_for_status()
-            account_data = response.json()
+        # Query account storage paths for NFT collections
+        response = await api_http_client.get(
+            f"{FLOW_ACCESS_NODE}/v1/accounts/{account_address}",
+            timeout=10.0
+        )
+        response.raise_for_status()
+        account_data = response.json()
 
         # Parse account data to find NFT collections
         nfts = []
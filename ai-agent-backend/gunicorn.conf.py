@@ -0,0 +1,16 @@
+"""
+Production server config:  gunicorn main:app -c gunicorn.conf.py
+Chat sessions and rate limits are shared between workers only when REDIS_URL
+is set; the autonomy engine runs in one worker per host (see main.lifespan).
+"""
+
+import os
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+# uvicorn[standard] gives each worker uvloop and httptools
+worker_class = "uvicorn_worker.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", (os.cpu_count() or 1) * 2 + 1))
+# A chat turn can chain several LLM and tool passes
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
@@ -0,0 +1,15 @@
+"""
+Shared pooled HTTP client for outbound API calls (1-Click, NEAR RPC,
+FastNEAR, Flow access node, CoinGecko/Binance).
+One keep-alive pool means repeat calls to the same host reuse an open
+TCP/TLS connection instead of handshaking per request.
+"""
+
+import httpx
+
+
+api_http_client = httpx.AsyncClient(
+    http2=True,
+    timeout=httpx.Timeout(10.0),
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+)
@@ -8,6 +8,7 @@ import os
 import base64
 import hashlib
 import secrets
+from functools import lru_cache
 from typing import Dict, Tuple
 
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
@@ -15,8 +16,9 @@ from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
 #   Encryption Key (from environment)  
 
+@lru_cache(maxsize=None)
 def _get_encryption_key() -> bytes:
-    """Get the 32-byte AES-256 encryption key from environment."""
+    """Get the 32-byte AES-256 encryption key from environment (derived once)."""
     raw = os.getenv("AGENT_ENCRYPTION_KEY", "")
     if not raw:
         # Auto-generate and warn (dev mode only)
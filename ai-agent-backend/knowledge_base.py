@@ -2,44 +2,137 @@
 Functions to fetch and manage token information from NEAR Intents API.
 LLM will handle answering questions naturally - no hardcoded FAQs.
 """
-from typing import Dict, List, Optional
+import asyncio
+import json
+import logging
+import os
+import sys
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import httpx
+from http_client import api_http_client
 from datetime import datetime, timedelta
 
+try:
+    # orjson parses the token list (hundreds of KB) several times faster than json
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+logger = logging.getLogger(__name__)
+
 # Cache for token list
 _token_cache: Optional[List[Dict]] = None
 _cache_timestamp: Optional[datetime] = None
 CACHE_DURATION = timedelta(hours=6)  # Refresh every 6 hours
 
+# Chains treated as "NEAR" for default token preference
+NEAR_CHAINS = frozenset({"near", "aurora"})
+NEAR_SYMBOL_ALIASES = frozenset({"WNEAR", "NEAR"})
+
+# First load of the cache is shared by concurrent requests
+_populate_lock = asyncio.Lock()
+_populated = asyncio.Event()
+# Refreshes after expiry are single-flight too
+_refresh_lock = asyncio.Lock()
+
+# Lookup indexes over _token_cache (rebuilt whenever the cache is refreshed)
+_by_symbol: Dict[str, List[Dict]] = {}
+_by_symbol_chain: Dict[Tuple[str, str], Dict] = {}
+_by_contract: Dict[str, Dict] = {}
+
+# Pre-rendered "[CHAIN] SYMBOL" token list pages (rebuilt with the cache)
+TOKEN_PAGE_SIZE = 20
+_tokens_formatted_pages: List[str] = []
+
+# Rendered formatter output for the current _token_cache (cleared on refresh)
+_display_cache: Dict[Any, Any] = {}
+
+# On-disk copy of the sorted token list, so restarts skip the API round trip
+TOKEN_CACHE_FILE = os.path.join(os.path.dirname(__file__), ".token_cache.json")
+
+
+def _save_token_cache_to_disk(tokens: List[Dict], timestamp: datetime) -> None:
+    """Write the token list atomically (temp file + os.replace)."""
+    tmp_path = TOKEN_CACHE_FILE + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"timestamp": timestamp.isoformat(), "tokens": tokens}, f)
+        os.replace(tmp_path, TOKEN_CACHE_FILE)
+    except OSError as e:
+        logger.warning("[KNOWLEDGE] Could not persist token cache: %s", e)
+
+
+def _load_token_cache_from_disk() -> None:
+    """
+    Populate the in-memory cache from TOKEN_CACHE_FILE if present.
+    An expired copy is still loaded (it is refreshed on the next fetch and
+    serves as the fallback if the API is down).
+    """
+    global _token_cache, _cache_timestamp
+    try:
+        with open(TOKEN_CACHE_FILE, "rb") as f:
+            data = _json_loads(f.read())
+        tokens = data["tokens"]
+        timestamp = datetime.fromisoformat(data["timestamp"])
+    except FileNotFoundError:
+        return
+    except Exception as e:
+        logger.warning("[KNOWLEDGE] Ignoring unreadable token cache file: %s", e)
+        return
+
+    if not isinstance(tokens, list) or not tokens:
+        return
+    for token in tokens:
+        token["symbol"] = sys.intern(token["symbol"])
+        token["blockchain"] = sys.intern(token.get("blockchain", "near"))
+
+    _token_cache = tokens
+    _cache_timestamp = timestamp
+    _build_token_index(tokens)
+    _build_token_pages(tokens)
+    logger.info("[KNOWLEDGE] Loaded %s tokens from disk cache (%s)", len(tokens), timestamp.isoformat())
+
+
+def _cache_fresh() -> bool:
+    return bool(_token_cache) and _cache_timestamp is not None and datetime.now() - _cache_timestamp < CACHE_DURATION
+
 
 async def get_available_tokens_from_api() -> List[Dict]:
     """
     Fetch supported tokens from the 1-Click API.
     Returns list of token dictionaries with symbol, name, decimals, etc.
-    Implements caching to avoid excessive API calls.
+    Implements caching to avoid excessive API calls; once the cache expires,
+    concurrent callers wait on a single refresh.
     
     Raises exception if API fails - no fallback tokens.
     """
-    global _token_cache, _cache_timestamp
-    
     # Check cache first
-    if _token_cache and _cache_timestamp:
-        if datetime.now() - _cache_timestamp < CACHE_DURATION:
-            print(f"[KNOWLEDGE] Using cached token list ({len(_token_cache)} tokens)")
+    if _cache_fresh():
+        logger.info("[KNOWLEDGE] Using cached token list (%s tokens)", len(_token_cache))
+        return _token_cache
+    
+    async with _refresh_lock:
+        # Another caller may have refreshed while we waited
+        if _cache_fresh():
             return _token_cache
+        return await _fetch_tokens_from_api()
+
+
+async def _fetch_tokens_from_api() -> List[Dict]:
+    """Fetch, normalize and cache the token list (callers hold _refresh_lock)."""
+    global _token_cache, _cache_timestamp
     
     try:
-        print("[KNOWLEDGE] Fetching token list from 1-Click API...")
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://1click.chaindefuser.com/v0/tokens",
-                timeout=10.0
-            )
-            response.raise_for_status()
-            data = response.json()
-        
+        logger.info("[KNOWLEDGE] Fetching token list from 1-Click API...")
+        response = await api_http_client.get(
+            "https://1click.chaindefuser.com/v0/tokens",
+            timeout=10.0
+        )
+        response.raise_for_status()
+        data = _json_loads(response.content)
+
         if not isinstance(data, list):
-            print("[KNOWLEDGE] Unexpected API response format")
+            logger.warning("[KNOWLEDGE] Unexpected API response format")
             raise ValueError("Can't get supported tokens - API returned unexpected format")
         
         def _sanitize(text: str) -> str:
@@ -53,17 +146,17 @@ async def get_available_tokens_from_api() -> List[Dict]:
             if item.get("assetId") and item.get("symbol"):
                 # Normalize NEAR/WNEAR
                 symbol = _sanitize(item["symbol"])
-                if symbol.upper() in ["WNEAR", "NEAR"]:
+                if symbol.upper() in NEAR_SYMBOL_ALIASES:
                     symbol = "NEAR"
                 
+                # Intern symbol/chain: they are compared and used as dict keys on every lookup
                 tokens.append({
-                    "symbol": symbol,
+                    "symbol": sys.intern(symbol),
                     "name": _sanitize(item.get("name", symbol)),
                     "decimals": item.get("decimals", 18),
                     "defuseAssetId": item["assetId"],
                     "contractAddress": item.get("contractAddress", ""),
-                    "blockchain": item.get("blockchain", "near")
-
+                    "blockchain": sys.intern(item.get("blockchain", "near"))
                 })
         
         if not tokens:
@@ -73,7 +166,7 @@ async def get_available_tokens_from_api() -> List[Dict]:
         def sort_key(t):
             chain = t.get("blockchain", "near").lower()
             # NEAR and Aurora first (priority 0), then others alphabetically
-            if chain in ["near", "aurora"]:
+            if chain in NEAR_CHAINS:
                 return (0, chain, t["symbol"].upper())
             return (1, chain, t["symbol"].upper())
         
@@ -82,36 +175,162 @@ async def get_available_tokens_from_api() -> List[Dict]:
         # Update cache
         _token_cache = sorted_tokens
         _cache_timestamp = datetime.now()
+        _build_token_index(sorted_tokens)
+        _build_token_pages(sorted_tokens)
+        _display_cache.clear()
+        await asyncio.to_thread(_save_token_cache_to_disk, sorted_tokens, _cache_timestamp)
         
-        print(f"[KNOWLEDGE] Loaded {len(sorted_tokens)} tokens from API (all chains)")
+        logger.info("[KNOWLEDGE] Loaded %s tokens from API (all chains)", len(sorted_tokens))
         return sorted_tokens
         
     except httpx.HTTPError as e:
-        print(f"[KNOWLEDGE] HTTP error fetching tokens from API: {e}")
+        logger.error("[KNOWLEDGE] HTTP error fetching tokens from API: %s", e)
         # If we have cache, return it even if expired
         if _token_cache:
-            print(f"[KNOWLEDGE] Using expired cache as fallback")
+            logger.warning("[KNOWLEDGE] Using expired cache as fallback")
             return _token_cache
         raise Exception("Can't get supported tokens for now - API unavailable")
     except Exception as e:
-        print(f"[KNOWLEDGE] Error fetching tokens from API: {e}")
+        logger.error("[KNOWLEDGE] Error fetching tokens from API: %s", e)
         # If we have cache, return it even if expired
         if _token_cache:
-            print(f"[KNOWLEDGE] Using expired cache as fallback")
+            logger.warning("[KNOWLEDGE] Using expired cache as fallback")
             return _token_cache
         raise Exception(f"Can't get supported tokens for now - {str(e)}")
 
 
 
 
+async def ensure_token_cache() -> None:
+    """
+    Make sure the token cache has been loaded at least once.
+    Concurrent callers wait on a single fetch instead of each hitting the API.
+    """
+    if _populated.is_set():
+        return
+    async with _populate_lock:
+        if _populated.is_set():
+            return
+        if not _token_cache:
+            logger.info("[KNOWLEDGE] Populating token cache...")
+            await get_available_tokens_from_api()
+        _populated.set()
+
+
+def _build_token_index(tokens: List[Dict]) -> None:
+    """
+    Build symbol and (symbol, chain) indexes over the token list.
+    Tokens are already sorted NEAR/Aurora first, so the first entry per
+    symbol is the preferred variant when no chain is given.
+    Also indexes by lowercased contract id (contractAddress and the
+    defuseAssetId after its "nep141:" style prefix).
+    """
+    global _by_symbol, _by_symbol_chain, _by_contract
+
+    by_symbol: Dict[str, List[Dict]] = {}
+    by_symbol_chain: Dict[Tuple[str, str], Dict] = {}
+    by_contract: Dict[str, Dict] = {}
+    for token in tokens:
+        symbol_upper = sys.intern(token["symbol"].upper())
+        chain_lower = sys.intern(token.get("blockchain", "near").lower())
+        by_symbol.setdefault(symbol_upper, []).append(token)
+        by_symbol_chain.setdefault((symbol_upper, chain_lower), token)
+        contract = (token.get("contractAddress") or "").lower()
+        if contract:
+            by_contract.setdefault(contract, token)
+        asset_contract = (token.get("defuseAssetId") or "").partition(":")[2].lower()
+        if asset_contract:
+            by_contract.setdefault(asset_contract, token)
+
+    _by_symbol = by_symbol
+    _by_symbol_chain = by_symbol_chain
+    _by_contract = by_contract
+
+
+def _build_token_pages(tokens: List[Dict], page_size: int = TOKEN_PAGE_SIZE) -> None:
+    """
+    Render the token list as [CHAIN] SYMBOL lines once and split it into pages,
+    so listing tokens only sends the model one page at a time.
+    """
+    global _tokens_formatted_pages
+
+    lines = [f"  [{t.get('blockchain', 'near').upper()}] {t['symbol']}" for t in tokens]
+    _tokens_formatted_pages = [
+        "\n".join(lines[i:i + page_size]) for i in range(0, len(lines), page_size)
+    ]
+
+
+def get_token_page(page: int = 1) -> str:
+    """
+    Get one page (1-based) of the [CHAIN] SYMBOL token list, NEAR chain first.
+    """
+    pages = _tokens_formatted_pages
+    if not pages:
+        return "No tokens available."
+
+    total = len(pages)
+    page = min(max(page, 1), total)
+    parts = [f"**Available Tokens (with chain)   page {page} of {total}:**", pages[page - 1]]
+    if page < total:
+        parts.append(f"\nSay 'more' to see page {page + 1}.")
+    return "\n".join(parts)
+
+
+def get_tokens_by_symbol(symbol: str) -> List[Dict]:
+    """Return every chain variant of a token symbol from the cached token list."""
+    return _by_symbol.get(symbol.upper(), [])
+
+
+def get_token_by_contract(contract: str) -> Optional[Dict]:
+    """Resolve a contract id (e.g. a FastNEAR contract_id) to a cached token."""
+    return _by_contract.get(contract.lower()) if contract else None
+
+
+def get_token_best_match(symbol: str, preferred_chain: Optional[str] = None, user_chains=()) -> Optional[Dict]:
+    """
+    Resolve a symbol to a single token variant from the cached token list.
+    Order of preference: the exact preferred_chain variant, then a variant on
+    one of the user's chains, then the default (NEAR first) variant.
+    """
+    symbol_upper = symbol.upper()
+    if preferred_chain:
+        token = _by_symbol_chain.get((symbol_upper, preferred_chain.lower()))
+        if token:
+            return token
+    
+    variants = _by_symbol.get(symbol_upper)
+    if not variants:
+        return None
+    for token in variants:
+        if token.get("blockchain", "near").lower() in user_chains:
+            return token
+    return variants[0]
+
+
+def _memoized(key: Any, tokens: List[Dict], build: Callable[[], Any]) -> Any:
+    """
+    Return build()'s output, computed once per token-cache snapshot when
+    tokens is the cached list. Any other list is rendered fresh.
+    """
+    if not tokens or tokens is not _token_cache:
+        return build()
+    cached = _display_cache.get(key)
+    if cached is None:
+        cached = _display_cache[key] = build()
+    return cached
+
+
 def get_token_symbols_list(tokens: List[Dict]) -> List[str]:
     """Extract just the symbol names from token list"""
-    return [t["symbol"] for t in tokens]
+    return list(_memoized("symbols", tokens, lambda: [t["symbol"] for t in tokens]))
 
 
 def get_token_symbols_with_chain(tokens: List[Dict]) -> List[str]:
     """Extract symbols with chain prefix: [CHAIN] SYMBOL"""
-    return [f"[{t.get('blockchain', 'near').upper()}] {t['symbol']}" for t in tokens]
+    return list(_memoized(
+        "symbols_with_chain", tokens,
+        lambda: [f"[{t.get('blockchain', 'near').upper()}] {t['symbol']}" for t in tokens]
+    ))
 
 
 def get_token_by_symbol(symbol: str, tokens: List[Dict], chain: str = None) -> Optional[Dict]:
@@ -122,6 +341,13 @@ def get_token_by_symbol(symbol: str, tokens: List[Dict], chain: str = None) -> O
     """
     symbol_upper = symbol.upper()
     
+    # Fast path: O(1) lookup when searching the cached token list
+    if tokens is _token_cache and _by_symbol:
+        if chain:
+            return _by_symbol_chain.get((symbol_upper, chain.lower()))
+        variants = _by_symbol.get(symbol_upper)
+        return variants[0] if variants else None
+    
     # If chain specified, find exact match
     if chain:
         chain_lower = chain.lower()
@@ -137,7 +363,7 @@ def get_token_by_symbol(symbol: str, tokens: List[Dict], chain: str = None) -> O
         if token["symbol"].upper() == symbol_upper:
             if first_match is None:
                 first_match = token
-            if token.get("blockchain", "near").lower() in ["near", "aurora"]:
+            if token.get("blockchain", "near").lower() in NEAR_CHAINS:
                 near_match = token
                 break
     
@@ -148,7 +374,11 @@ def format_token_list_for_display(tokens: List[Dict]) -> str:
     """Format token list for displaying to user"""
     if not tokens:
         return "No tokens available at the moment."
-    
+    return _memoized("display", tokens, lambda: _render_token_list_for_display(tokens))
+
+
+def _render_token_list_for_display(tokens: List[Dict]) -> str:
+    """Build the per-chain display text for format_token_list_for_display."""
     # Group by blockchain for better organization
     by_chain = {}
     for token in tokens:
@@ -173,7 +403,11 @@ def format_tokens_with_chain_prefix(tokens: List[Dict], limit: int = 80) -> str:
     """
     if not tokens:
         return "No tokens available."
-    
+    return _memoized(("chain_prefix", limit), tokens, lambda: _render_tokens_with_chain_prefix(tokens, limit))
+
+
+def _render_tokens_with_chain_prefix(tokens: List[Dict], limit: int) -> str:
+    """Build the [CHAIN] SYMBOL text for format_tokens_with_chain_prefix."""
     # Tokens are already sorted with NEAR first
     lines = ["**Available Tokens (with chain):**"]
     
@@ -187,3 +421,5 @@ def format_tokens_with_chain_prefix(tokens: List[Dict], limit: int = 80) -> str:
     
     return "\n".join(lines)
 
+
+_load_token_cache_from_disk()
@@ -1,16 +1,36 @@
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any, Union
 from contextlib import asynccontextmanager
 
-import uuid
+import asyncio
+import re
 import uvicorn
 import os
 import sys
 import io
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI
+from langchain_core.messages import SystemMessage, HumanMessage
+
+try:
+    # SSE events are serialized per streamed token
+    from orjson import dumps as _json_dumps
+except ImportError:
+    from json import dumps as _stdlib_json_dumps
+
+    def _json_dumps(obj: Any) -> bytes:
+        return _stdlib_json_dumps(obj).encode()
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 # Force UTF-8 for stdout/stderr to prevent crashes on Windows with Unicode characters
 if sys.platform == "win32":
@@ -18,33 +38,29 @@ if sys.platform == "win32":
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', line_buffering=True)
 
 
-# Rate limiting
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-
 load_dotenv()
 
 # Import our Agent logic
-from agents import process_message
-from knowledge_base import get_available_tokens_from_api, format_token_list_for_display
+from agents import process_message, process_message_stream, summarize_history, llm_http_client
+from knowledge_base import get_available_tokens_from_api, ensure_token_cache
+from context_window import warm_encoder, count_tokens
+from http_client import api_http_client
+from session_store import load_session, save_session, load_summary, save_summary, close_session_store
+from middleware import RequestLogMiddleware, RateLimitMiddleware, HealthCheckMiddleware
 
 # Import v2 autonomy modules (additive   does NOT touch existing logic)
 from database import (
     init_db, get_user, upsert_user, add_strategy,
     get_active_strategies, deactivate_strategy,
     get_agent_logs, activate_kill_switch, deactivate_kill_switch,
-    save_agent_key, get_agent_key, get_all_agent_keys,
-    update_agent_key_status, delete_agent_key, delete_all_user_agent_keys
+    save_agent_key, get_all_agent_keys, update_agent_key_status,
+    delete_agent_key, delete_all_user_agent_keys, clear_user_agent_wallet
 )
 from key_manager import (
     generate_near_keypair, generate_evm_keypair, generate_flow_keypair,
     encrypt_private_key, get_near_implicit_address
 )
 
-# Initialize Limiter
-limiter = Limiter(key_func=get_remote_address)
-
 # Suppress noisy polling logs (GET requests from 10s frontend polling)
 class _PollFilter(logging.Filter):
     _QUIET = ["/api/settings/", "/api/strategies/", "/api/logs/",
@@ -55,40 +71,86 @@ class _PollFilter(logging.Filter):
 
 logging.getLogger("uvicorn.access").addFilter(_PollFilter())
 
+# Logs are handed to a queue and written by a listener thread, so a slow
+# stderr never blocks the event loop. The queue handler sits on the root
+# logger; the backend's own module loggers use AGENT_LOG_LEVEL (DEBUG for
+# detail), third-party loggers keep the root's WARNING.
+APP_LOGGERS = (
+    "agents", "agent_tools", "flow_agent_tools", "tools",
+    "knowledge_base", "context_window", "middleware", "session_store",
+)
+_agent_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_agent_log_stream = logging.StreamHandler()
+_agent_log_stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+_agent_log_listener = QueueListener(_agent_log_queue, _agent_log_stream)
+logging.getLogger().addHandler(QueueHandler(_agent_log_queue))
+for _name in APP_LOGGERS:
+    logging.getLogger(_name).setLevel(os.getenv("AGENT_LOG_LEVEL", "INFO").upper())
+
 # -- App Lifespan (init DB + autonomy scheduler) ------------------
+AUTONOMY_LOCK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".autonomy_engine.lock")
+
+
+def _claim_autonomy_engine():
+    """
+    Under gunicorn every worker runs the lifespan, and each running the
+    scheduler would execute every strategy once per worker. The first worker
+    to take this host-wide file lock runs it; the lock is released when that
+    process exits. Returns the open lock file, True when locking is not
+    available (single-process dev server), or None if another worker has it.
+    """
+    if fcntl is None:
+        return True
+    lock = open(AUTONOMY_LOCK_FILE, "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return None
+    return lock
+
+
 @asynccontextmanager
 async def lifespan(app):
     """Startup: init database + start autonomy scheduler."""
     # Initialize SQLite database
     init_db()
     print("[STARTUP] Neptune database ready")
+    _agent_log_listener.start()
     
+    # Load the tokenizer used for history budgeting (may download once)
+    await asyncio.to_thread(warm_encoder)
+
     # Pre-fetch token list so the autonomy engine can map contracts -> symbols
     try:
         await get_available_tokens_from_api()
     except Exception as e:
         print(f"[STARTUP] Warning: Failed to pre-fetch tokens: {e}")
 
-    # Start autonomy engine (background scheduler)
+    # Start autonomy engine (background scheduler), in one worker only
     scheduler = None
-    try:
-        from apscheduler.schedulers.asyncio import AsyncIOScheduler
-        from autonomy_engine import check_all_strategies
-
-        scheduler = AsyncIOScheduler()
-        scheduler.add_job(
-            check_all_strategies,
-            'interval',
-            seconds=30,
-            id='strategy_check',
-            replace_existing=True
-        )
-        scheduler.start()
-        print("[STARTUP] Autonomy engine started (every 30 sec)")
-    except ImportError:
-        print("[STARTUP] APScheduler not installed   autonomy engine disabled")
-    except Exception as e:
-        print(f"[STARTUP] Autonomy engine error: {e}")
+    engine_lock = _claim_autonomy_engine()
+    if not engine_lock:
+        print("[STARTUP] Autonomy engine runs in another worker")
+    else:
+        try:
+            from apscheduler.schedulers.asyncio import AsyncIOScheduler
+            from autonomy_engine import check_all_strategies
+
+            scheduler = AsyncIOScheduler()
+            scheduler.add_job(
+                check_all_strategies,
+                'interval',
+                seconds=30,
+                id='strategy_check',
+                replace_existing=True
+            )
+            scheduler.start()
+            print("[STARTUP] Autonomy engine started (every 30 sec)")
+        except ImportError:
+            print("[STARTUP] APScheduler not installed   autonomy engine disabled")
+        except Exception as e:
+            print(f"[STARTUP] Autonomy engine error: {e}")
 
     yield  # App is running
 
@@ -96,11 +158,15 @@ async def lifespan(app):
     if scheduler:
         scheduler.shutdown()
         print("[SHUTDOWN] Autonomy engine stopped")
+    if hasattr(engine_lock, "close"):
+        engine_lock.close()
+    await llm_http_client.aclose()
+    await api_http_client.aclose()
+    await close_session_store()
+    _agent_log_listener.stop()
 
 
 app = FastAPI(title="Neptune AI Agent", lifespan=lifespan)
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 # Strict CORS Policy (Production Only)
 ORIGINS = [
@@ -113,6 +179,12 @@ ORIGINS = [
 ]
 
 
+# Added first so it sits inside CORS (429 responses get CORS headers)
+app.add_middleware(
+    RateLimitMiddleware,
+    rules={"/chat": (20, 60), "/chat/stream": (20, 60)},
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ORIGINS,
@@ -121,11 +193,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    print(f"DEBUG: {request.method} {request.url.path}")
-    response = await call_next(request)
-    return response
+app.add_middleware(RequestLogMiddleware)
+
+# Added last so it is outermost: health probes skip logging, CORS and routing.
+# /api/health is the keep-alive for external ping services (like UptimeRobot)
+# that stop free-tier hosts (like Render) from sleeping the background engine.
+app.add_middleware(
+    HealthCheckMiddleware,
+    responses={
+        "/api/health": b'{"status":"ok","engine":"running"}',
+        "/health": b'{"status":"ok"}',
+    },
+)
 
 
 from fastapi.exceptions import RequestValidationError
@@ -145,8 +224,9 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         content={"detail": exc.errors(), "body": str(exc)},
     )
 
-# In-memory session store
-sessions: Dict[str, Dict[str, Any]] = {}
+# In-flight history folds per session (this process only), so one
+# session's summaries apply in order
+_summary_tasks: Dict[str, asyncio.Task] = {}
 
 class ChatRequest(BaseModel):
     message: str
@@ -166,28 +246,17 @@ class ChatResponse(BaseModel):
 # EXISTING ENDPOINTS (unchanged)
 # ==================================================================
 
-@app.get("/api/health")
-async def health_check():
-    """
-    Lightweight keep-alive endpoint for external ping services (like UptimeRobot)
-    to prevent free-tier hosting services (like Render) from sleeping the background engine.
-    """
-    return {"status": "ok", "engine": "running"}
-
-@app.post("/chat", response_model=ChatResponse)
-@limiter.limit("20/minute")
-async def chat_endpoint(body: ChatRequest, request: Request):
+async def _prepare_chat(body: ChatRequest):
+    """Get (or create) the chat session and build the agent's user context."""
     session_id = body.session_id
-    user_msg = body.message
-    
-    if session_id not in sessions:
-        sessions[session_id] = {
-            "history": [],
-            "state": {"step": "IDLE"}
-        }
     
-    session_data = sessions[session_id]
-    current_state = session_data["state"]
+    # The swap agent waits for the token cache first; warm it while the
+    # session loads (a no-op once populated, and its errors surface there)
+    session_data, _ = await asyncio.gather(
+        load_session(session_id), ensure_token_cache(), return_exceptions=True
+    )
+    if isinstance(session_data, BaseException):
+        raise session_data
     history = session_data["history"]
     
     wallet_addresses = body.wallet_addresses or {}
@@ -199,19 +268,53 @@ async def chat_endpoint(body: ChatRequest, request: Request):
         "wallet_addresses": wallet_addresses,
         "balances": body.balances or {},
         "wallet_type": body.wallet_type or "hotkit",
-        "history": history
+        "history": history,
+        "history_summary": session_data["history_summary"],
+        "session_id": session_id
     }
-    result = await process_message(user_msg, current_state, user_context)
-    
+    return session_data, user_context
+
+
+# Messages kept verbatim (3 rounds, what the swap agent replays); older
+# rounds are folded into a rolling summary once FOLD_MESSAGES have piled up,
+# so the summary is regenerated every 2 rounds rather than every turn.
+HISTORY_VERBATIM_MESSAGES = 6
+HISTORY_FOLD_MESSAGES = 4
+
+
+async def _fold_history(session_id: str, older: List[Dict[str, str]], previous_task) -> None:
+    """Merge older messages into the session summary (runs in the background)."""
+    if previous_task is not None:
+        # Folds of one session apply in order
+        await asyncio.gather(previous_task, return_exceptions=True)
+    summary = await summarize_history(await load_summary(session_id), older)
+    await save_summary(session_id, summary)
+
+
+async def _finish_chat(session_id: str, session_data: Dict[str, Any], user_msg: str, result: Dict[str, Any]) -> ChatResponse:
+    """Store the new state and history for a finished turn and build the reply."""
     session_data["state"] = result.get("new_state", {"step": "IDLE"})
     
-    import re
+    history = session_data["history"]
     ai_text = re.sub(r'[^\x00-\x7F]+', ' ', result["response"])
-    history.append({"role": "user", "content": user_msg})
-    history.append({"role": "ai", "content": ai_text})
+    # Token counts are taken once here; history selection reuses them every turn
+    history.append({"role": "user", "content": user_msg, "tokens": count_tokens(user_msg)})
+    history.append({"role": "ai", "content": ai_text, "tokens": count_tokens(ai_text)})
+
+    overflow = len(history) - HISTORY_VERBATIM_MESSAGES
+    if overflow >= HISTORY_FOLD_MESSAGES:
+        # Trim in place: only the folded messages are copied
+        older = history[:overflow]
+        del history[:overflow]
+        task = asyncio.create_task(
+            _fold_history(session_id, older, _summary_tasks.get(session_id))
+        )
+        _summary_tasks[session_id] = task
+        task.add_done_callback(
+            lambda t: _summary_tasks.pop(session_id, None) if _summary_tasks.get(session_id) is t else None
+        )
 
-    if len(history) > 20:
-        session_data["history"] = history[-20:]
+    await save_session(session_id, session_data)
 
     return ChatResponse(
         response=ai_text,
@@ -219,17 +322,47 @@ async def chat_endpoint(body: ChatRequest, request: Request):
         payload=result.get("payload")
     )
 
-@app.get("/health")
-def health_check():
-    return {"status": "ok"}
 
-@app.get("/tokens")
+@app.post("/chat", response_model=ChatResponse)
+async def chat_endpoint(body: ChatRequest):
+    session_data, user_context = await _prepare_chat(body)
+    result = await process_message(body.message, session_data["state"], user_context)
+    return await _finish_chat(body.session_id, session_data, body.message, result)
+
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(body: ChatRequest):
+    """
+    Same as /chat, streamed as Server-Sent Events: `token` events carry answer
+    text as it is generated, then one `done` event carries the final
+    ChatResponse fields (its response replaces the streamed text), or one
+    `error` event if the turn failed. The session is saved as part of the
+    turn, so it is kept even if the client disconnects mid-stream.
+    """
+    session_data, user_context = await _prepare_chat(body)
+    
+    def finish(result: Dict[str, Any]):
+        return _finish_chat(body.session_id, session_data, body.message, result)
+    
+    async def events():
+        async for event in process_message_stream(body.message, session_data["state"], user_context, finish):
+            if event["type"] == "token":
+                yield b"data: " + _json_dumps(event) + b"\n\n"
+            elif event["type"] == "error":
+                yield b"data: " + _json_dumps({"type": "error", "detail": event["error"]}) + b"\n\n"
+            else:
+                yield b"data: " + _json_dumps({"type": "done", **event["result"].model_dump()}) + b"\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+# The full token list is large: serialize it with orjson directly
+@app.get("/tokens", response_class=ORJSONResponse)
 async def get_tokens():
     try:
         tokens = await get_available_tokens_from_api()
-        return {"tokens": tokens, "count": len(tokens)}
+        return ORJSONResponse({"tokens": tokens, "count": len(tokens)})
     except Exception as e:
-        return {"error": str(e), "tokens": [], "count": 0}
+        return ORJSONResponse({"error": str(e), "tokens": [], "count": 0})
 
 
 # ==================================================================
@@ -315,24 +448,23 @@ async def create_strategy(body: StrategyRequest):
     return {"status": "created", "strategy_id": strategy_id}
 
 
+# Built once at import: constructing ChatOpenAI per request rebuilt the client
+# (and its connection pool) on every parse call.
+strategy_parse_llm = ChatOpenAI(
+    model="openai/gpt-oss-120b",
+    temperature=0,
+    openai_api_key=os.getenv("NEAR_AI_API_KEY"),
+    openai_api_base="https://cloud-api.near.ai/v1",
+    http_async_client=llm_http_client
+)
+STRATEGY_PARSE_SYSTEM_MSG = SystemMessage(content="You extract strategy parameters from natural language. Return only valid JSON. Use ONLY the tokens the user explicitly mentions.")
+
+
 @app.post("/api/strategies/parse")
 async def parse_strategy(body: StrategyParseRequest):
     """Parse NLP text into a strategy using LLM."""
     import json as _json
     try:
-        from langchain_openai import ChatOpenAI
-        from langchain_core.messages import SystemMessage, HumanMessage
-
-        import os
-        api_key = os.getenv("NEAR_AI_API_KEY")
-
-        llm = ChatOpenAI(
-            model="openai/gpt-oss-120b",
-            temperature=0,
-            openai_api_key=api_key,
-            openai_api_base="https://cloud-api.near.ai/v1"
-        )
-
         parse_prompt = f"""Extract strategy parameters from this natural language description.
 Strategy type: {body.strategy_type}
 User text: "{body.nlp_text}"
@@ -351,8 +483,8 @@ IMPORTANT RULES:
 
 Return ONLY the JSON object, no markdown or explanation."""
 
-        response = llm.invoke([
-            SystemMessage(content="You extract strategy parameters from natural language. Return only valid JSON. Use ONLY the tokens the user explicitly mentions."),
+        response = await strategy_parse_llm.ainvoke([
+            STRATEGY_PARSE_SYSTEM_MSG,
             HumanMessage(content=parse_prompt)
         ])
 
@@ -497,10 +629,6 @@ async def propose_agent_key(wallet_address: str, chain: str = "near"):
     Proposes a new agent keypair. The agent stores the encrypted private key
     and returns the public key for the user to add as an access key on-chain.
     """
-    from key_manager import generate_near_keypair, generate_evm_keypair, generate_flow_keypair
-    from key_manager import encrypt_private_key
-    from database import save_agent_key
-
     chain = chain.lower()
     if chain == "near":
         keypair = generate_near_keypair()
@@ -575,7 +703,6 @@ async def activate_agent_key(body: ActivateAgentKeyRequest):
     """
     Finalizes agent key activation after the user has authorized it on-chain.
     """
-    from database import update_agent_key_status
     update_agent_key_status(
         key_id=body.key_id,
         status="active",
@@ -602,17 +729,22 @@ async def list_agent_keys(wallet_address: str):
 
 
 
+# RPC endpoints for agent wallet balances (the frontend polls this endpoint,
+# so it uses the shared keep-alive client rather than blocking requests calls)
+NEAR_RPC_URL = os.getenv("NEAR_RPC_URL", "https://rpc.mainnet.near.org")
+ETH_RPC_URL = os.getenv("ETH_RPC_URL", "https://eth.llamarpc.com")
+FLOW_API_URL = os.getenv("FLOW_API_URL", "https://rest-mainnet.onflow.org")
+
+
 @app.get("/api/agent-wallet/balance/{address}")
 async def get_agent_wallet_balance(address: str, chain: str = "near"):
     """Check the balance of an agent wallet via RPC. Supports near, evm, flow."""
-    import requests as req
     try:
         if chain == "near":
-            rpc_url = os.getenv("NEAR_RPC_URL", "https://rpc.mainnet.near.org")
-            resp = req.post(rpc_url, json={
+            resp = await api_http_client.post(NEAR_RPC_URL, json={
                 "jsonrpc": "2.0", "id": "1", "method": "query",
                 "params": {"request_type": "view_account", "finality": "final", "account_id": address}
-            }, timeout=10)
+            })
             result = resp.json().get("result", {})
             if "error" in result:
                 return {"balance": "0", "formatted": "0 NEAR", "exists": False}
@@ -621,11 +753,10 @@ async def get_agent_wallet_balance(address: str, chain: str = "near"):
             return {"balance": amount, "formatted": f"{near_bal:.4f} NEAR", "exists": True}
 
         elif chain == "evm":
-            rpc_url = os.getenv("ETH_RPC_URL", "https://eth.llamarpc.com")
-            resp = req.post(rpc_url, json={
+            resp = await api_http_client.post(ETH_RPC_URL, json={
                 "jsonrpc": "2.0", "id": 1, "method": "eth_getBalance",
                 "params": [address, "latest"]
-            }, timeout=10)
+            })
             result = resp.json().get("result", "0x0")
             wei = int(result, 16)
             eth_bal = wei / 1e18
@@ -633,8 +764,7 @@ async def get_agent_wallet_balance(address: str, chain: str = "near"):
 
         elif chain == "flow":
             # Flow Access API
-            api_url = os.getenv("FLOW_API_URL", "https://rest-mainnet.onflow.org")
-            resp = req.get(f"{api_url}/v1/accounts/{address}", timeout=10)
+            resp = await api_http_client.get(f"{FLOW_API_URL}/v1/accounts/{address}")
             if resp.status_code == 200:
                 data = resp.json()
                 balance = int(data.get("balance", "0"))
@@ -659,8 +789,6 @@ async def remove_agent_wallet(body: DeleteAgentWalletRequest):
     """Remove an agent wallet definitively and clear user settings."""
     print(f"[API] Remove request for user: {body.wallet_address}, key_id: {body.key_id}")
     
-    from database import delete_agent_key, clear_user_agent_wallet, delete_all_user_agent_keys
-    
     # 1. Delete the specific key if provided
     if body.key_id > 0:
         delete_agent_key(body.key_id)
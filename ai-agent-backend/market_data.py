@@ -4,11 +4,17 @@ Fetches live price data for strategy evaluation.
 Separate module: does NOT touch existing chat/swap logic.
 """
 
-import httpx
+from http_client import api_http_client
 import os
 from typing import Dict, Optional
 from datetime import datetime, timedelta
 
+try:
+    # orjson parses the price feeds (Binance returns every ticker) faster than json
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
 # Simple in-memory price cache
 _price_cache: Dict[str, Dict] = {}
 _cache_timestamp: Optional[datetime] = None
@@ -37,13 +43,12 @@ async def get_token_prices(tokens: list = None) -> Dict[str, float]:
     ids_str = ",".join(coingecko_ids.values())
 
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(
-                "https://api.coingecko.com/api/v3/simple/price",
-                params={"ids": ids_str, "vs_currencies": "usd", "include_24hr_change": "true"}
-            )
-            resp.raise_for_status()
-            data = resp.json()
+        resp = await api_http_client.get(
+            "https://api.coingecko.com/api/v3/simple/price",
+            params={"ids": ids_str, "vs_currencies": "usd", "include_24hr_change": "true"}
+        )
+        resp.raise_for_status()
+        data = _json_loads(resp.content)
 
         # Map back to symbols
         reverse_map = {v: k for k, v in coingecko_ids.items()}
@@ -65,11 +70,10 @@ async def get_token_prices(tokens: list = None) -> Dict[str, float]:
         # Fallback 1: Binance API for major tokens
         try:
             print(f"[MARKET] CoinGecko error ({e}). Attempting Binance fallback...")
-            async with httpx.AsyncClient(timeout=10) as client:
-                resp = await client.get("https://api.binance.com/api/v3/ticker/price")
-                resp.raise_for_status()
-                data = resp.json()
-                
+            resp = await api_http_client.get("https://api.binance.com/api/v3/ticker/price")
+            resp.raise_for_status()
+            data = _json_loads(resp.content)
+            
             binance_map = {
                 "BTCUSDT": "btc", "ETHUSDT": "eth", "NEARUSDT": "near",
                 "SOLUSDT": "sol", "BNBUSDT": "bnb", "ARBUSDT": "arb",
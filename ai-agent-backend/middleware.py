@@ -0,0 +1,115 @@
+"""
+Request logging and rate limiting as plain ASGI middleware.
+Unlike BaseHTTPMiddleware (what @app.middleware("http") builds), these don't
+wrap each request in an extra task and memory stream.
+"""
+
+import logging
+import time
+from typing import Dict, Tuple
+
+from session_store import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class RequestLogMiddleware:
+    """Logs every HTTP request (method and path) at DEBUG level."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            logger.debug("[HTTP] %s %s", scope["method"], scope["path"])
+        await self.app(scope, receive, send)
+
+
+class HealthCheckMiddleware:
+    """
+    Answers GET/HEAD on the given paths with a fixed JSON body before any
+    other middleware or routing runs. responses maps a path to its body.
+    """
+
+    def __init__(self, app, responses: Dict[str, bytes]):
+        self.app = app
+        self.responses = responses
+
+    async def __call__(self, scope, receive, send):
+        body = self.responses.get(scope["path"]) if scope["type"] == "http" else None
+        if body is None or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
+
+
+class RateLimitMiddleware:
+    """
+    Fixed-window rate limit per client IP and path.
+    rules maps a path to (limit, period_seconds), e.g. {"/chat": (20, 60)}.
+    Counters live in Redis when session_store has a client (shared by all
+    workers), otherwise in this process.
+    """
+
+    def __init__(self, app, rules: Dict[str, Tuple[int, int]]):
+        self.app = app
+        self.rules = rules
+        # (path, ip) -> (window index, count)
+        self._counts: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        self._last_sweep = 0.0
+
+    async def _hit(self, path: str, ip: str, period: int) -> int:
+        """Count this request and return the window's total so far."""
+        now = time.time()
+        window = int(now) // period
+        if redis_client is not None:
+            key = f"rl:{path}:{ip}:{window}"
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.incr(key)
+                pipe.expire(key, period)
+                count, _ = await pipe.execute()
+            return count
+
+        if now - self._last_sweep >= period:
+            # Drop counters from finished windows
+            self._last_sweep = now
+            self._counts = {
+                k: v for k, v in self._counts.items()
+                if v[0] == int(now) // self.rules[k[0]][1]
+            }
+        start, count = self._counts.get((path, ip), (window, 0))
+        count = count + 1 if start == window else 1
+        self._counts[(path, ip)] = (window, count)
+        return count
+
+    async def __call__(self, scope, receive, send):
+        rule = self.rules.get(scope["path"]) if scope["type"] == "http" else None
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        limit, period = rule
+        ip = scope["client"][0] if scope.get("client") else "127.0.0.1"
+        if await self._hit(scope["path"], ip, period) <= limit:
+            await self.app(scope, receive, send)
+            return
+
+        body = f'{{"error":"Rate limit exceeded: {limit} per {period} seconds"}}'.encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(period - int(time.time()) % period).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -59,6 +59,9 @@ You receive strategy and execution context and must generate:
 The "text" field is a plain-text version. Return ONLY the JSON, no markdown fencing.
 """
 
+# Built once; reused for every drafted email
+NOTIFICATION_SYSTEM_MSG = SystemMessage(content=NOTIFICATION_PROMPT)
+
 
 #   Notification Functions  
 
@@ -137,7 +140,7 @@ Market Context:
         print(f"[NOTIFY] Drafting email for {user_wallet} ({strategy_type})")
 
         response = await notification_llm.ainvoke([
-            SystemMessage(content=NOTIFICATION_PROMPT),
+            NOTIFICATION_SYSTEM_MSG,
             HumanMessage(content=context)
         ])
 
@@ -11,7 +11,9 @@ Example: "Set alert for BTC at 5%, rebalance my portfolio, and quote 0.1 NEAR to
 import os
 import json
 import asyncio
-from typing import Dict, Any, List
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
 
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
@@ -28,6 +30,32 @@ orchestrator_llm = ChatOpenAI(
     openai_api_base="https://cloud-api.near.ai/v1"
 )
 
+# Splitting is deterministic (temperature 0), so identical messages
+# (retries, regenerations) reuse the previous split instead of calling the LLM
+_CACHEABLE = orchestrator_llm.temperature == 0
+_SPLIT_CACHE_SIZE = 512
+_split_cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+
+
+def _messages_key(messages: List[Any]) -> str:
+    """Stable hash of an outgoing message list."""
+    payload = json.dumps([(m.type, m.content) for m in messages])
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def _split_cache_get(key: str) -> Optional[List[Dict[str, Any]]]:
+    intents = _split_cache.get(key)
+    if intents is not None:
+        _split_cache.move_to_end(key)
+    return intents
+
+
+def _split_cache_put(key: str, intents: List[Dict[str, Any]]) -> None:
+    _split_cache[key] = intents
+    _split_cache.move_to_end(key)
+    if len(_split_cache) > _SPLIT_CACHE_SIZE:
+        _split_cache.popitem(last=False)
+
 
 # -- Intent Splitter Prompt ---------------------------------------
 
@@ -55,6 +83,7 @@ Return ONLY valid JSON array, no markdown:
   {"type": "autonomy", "has_enough_info": false, "extracted_query": "rebalance my portfolio"}
 ]
 """
+SPLIT_SYSTEM_MSG = SystemMessage(content=SPLIT_PROMPT)
 
 
 async def split_intents(user_msg: str) -> List[Dict[str, Any]]:
@@ -62,11 +91,17 @@ async def split_intents(user_msg: str) -> List[Dict[str, Any]]:
     Use LLM to split a compound message into individual intents.
     Returns list of intent dicts with type, has_enough_info, extracted_query.
     """
+    messages = [SPLIT_SYSTEM_MSG, HumanMessage(content=user_msg)]
+    cache_key = _messages_key(messages) if _CACHEABLE else None
+    if cache_key:
+        cached = _split_cache_get(cache_key)
+        if cached is not None:
+            print(f"[ORCHESTRATOR] Split cache hit ({len(cached)} intent(s))")
+            # Callers may mutate intents, so hand out copies
+            return [dict(i) for i in cached]
+
     try:
-        response = await orchestrator_llm.ainvoke([
-            SystemMessage(content=SPLIT_PROMPT),
-            HumanMessage(content=user_msg)
-        ])
+        response = await orchestrator_llm.ainvoke(messages)
 
         raw = response.content.strip()
         # Strip markdown code fences if present
@@ -81,6 +116,8 @@ async def split_intents(user_msg: str) -> List[Dict[str, Any]]:
             return [{"type": "general", "has_enough_info": True, "extracted_query": user_msg}]
 
         print(f"[ORCHESTRATOR] Split into {len(intents)} intent(s): {[i['type'] for i in intents]}")
+        if cache_key:
+            _split_cache_put(cache_key, [dict(i) for i in intents])
         return intents
 
     except Exception as e:
@@ -161,8 +161,8 @@ You have access to the following tools. **Choosing the RIGHT tool is critical.**
 **1. `get_available_tokens_tool`**   List ALL supported tokens
    -   USE when: user asks "what tokens do you support?", "list all tokens", "show me everything"
    -   DO NOT USE when: user asks about a SPECIFIC token (use `get_token_chains_tool` instead)
-   - Takes: no arguments
-   - Returns: full list of [CHAIN] TOKEN entries
+   - Takes: optional `page` (default 1); pass the next page number when the user says "more"
+   - Returns: one page of [CHAIN] TOKEN entries
 
 **2. `get_token_chains_tool`**   Chains for a SPECIFIC token
    -   USE when: user asks about ONE specific token's availability, chains, networks, or options
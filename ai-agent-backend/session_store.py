@@ -0,0 +1,125 @@
+"""
+Chat session store.
+Sessions live in Redis when REDIS_URL is set, so every uvicorn worker sees the
+same history and sessions survive restarts; otherwise they are kept in this
+process's memory. Either way a session expires SESSION_TTL seconds after its
+last write.
+"""
+
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+try:
+    from orjson import loads as _json_loads, dumps as _json_dumps
+except ImportError:  # stdlib fallback
+    from json import loads as _json_loads, dumps as _json_dumps
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "")
+SESSION_TTL = int(os.getenv("SESSION_TTL", "86400"))  # 24h
+SWEEP_INTERVAL = 60  # seconds between expiry sweeps of the in-memory store
+# In-memory store cap; past it, least recently used sessions are evicted
+# down to 80% so eviction does not run on every write near the limit
+MAX_LOCAL_SESSIONS = int(os.getenv("SESSION_MAX_LOCAL", "10000"))
+
+redis_client = None
+if REDIS_URL:
+    if aioredis is None:
+        logger.warning("[SESSIONS] REDIS_URL is set but redis is not installed   using in-memory sessions")
+    else:
+        redis_client = aioredis.from_url(REDIS_URL, decode_responses=True)
+
+# In-memory fallback: key -> (expires_at, value), least recently used first
+_local: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+_last_sweep = 0.0
+
+
+def _session_key(session_id: str) -> str:
+    return f"sess:{session_id}"
+
+
+def _summary_key(session_id: str) -> str:
+    # Kept apart from the session so a background summary write never
+    # races with the turn that saves history and state
+    return f"sess:{session_id}:summary"
+
+
+def _local_get(key: str) -> Any:
+    entry = _local.get(key)
+    if entry is None or entry[0] < time.monotonic():
+        return None
+    _local.move_to_end(key)
+    return entry[1]
+
+
+def _local_set(key: str, value: Any) -> None:
+    global _last_sweep
+    now = time.monotonic()
+    _local[key] = (now + SESSION_TTL, value)
+    _local.move_to_end(key)
+    # Up to two keys per session (history/state and summary)
+    if len(_local) > 2 * MAX_LOCAL_SESSIONS:
+        for _ in range(len(_local) - int(1.6 * MAX_LOCAL_SESSIONS)):
+            _local.popitem(last=False)
+    if now - _last_sweep >= SWEEP_INTERVAL:
+        _last_sweep = now
+        for k in [k for k, (expires_at, _) in _local.items() if expires_at < now]:
+            del _local[k]
+
+
+async def load_session(session_id: str) -> Dict[str, Any]:
+    """Get the session (history, state, history_summary), or a fresh one."""
+    if redis_client is not None:
+        raw, summary = await redis_client.mget(_session_key(session_id), _summary_key(session_id))
+        session = _json_loads(raw) if raw else None
+    else:
+        session = _local_get(_session_key(session_id))
+        summary = _local_get(_summary_key(session_id))
+
+    if session is None:
+        session = {"history": [], "state": {"step": "IDLE"}}
+    session["history_summary"] = summary or ""
+    return session
+
+
+async def save_session(session_id: str, session: Dict[str, Any]) -> None:
+    """Persist history and state, and refresh the session's TTL."""
+    data = {"history": session["history"], "state": session["state"]}
+    if redis_client is not None:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.set(_session_key(session_id), _json_dumps(data), ex=SESSION_TTL)
+            pipe.expire(_summary_key(session_id), SESSION_TTL)
+            await pipe.execute()
+    else:
+        _local_set(_session_key(session_id), data)
+        summary = _local_get(_summary_key(session_id))
+        if summary is not None:
+            _local_set(_summary_key(session_id), summary)
+
+
+async def load_summary(session_id: str) -> str:
+    """Rolling summary of the session's older messages ("" if none)."""
+    if redis_client is not None:
+        return await redis_client.get(_summary_key(session_id)) or ""
+    return _local_get(_summary_key(session_id)) or ""
+
+
+async def save_summary(session_id: str, summary: str) -> None:
+    if redis_client is not None:
+        await redis_client.set(_summary_key(session_id), summary, ex=SESSION_TTL)
+    else:
+        _local_set(_summary_key(session_id), summary)
+
+
+async def close_session_store() -> None:
+    if redis_client is not None:
+        await redis_client.aclose()
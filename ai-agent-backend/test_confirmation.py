@@ -0,0 +1,21 @@
+import os
+
+os.environ.setdefault("NEAR_AI_API_KEY", "test")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import pytest
+
+from agents import _is_confirmation
+
+
+@pytest.mark.parametrize("reply", ["yes", "ok", "Okay, go ahead", "confirmed!", "yep proceed", "Y"])
+def test_confirm_replies(reply):
+    assert _is_confirmation(reply)
+
+
+@pytest.mark.parametrize("reply", [
+    "no, don't go", "not ok", "no", "cancel", "stop, go back", "don't proceed",
+    "I won't confirm that", "nope", "wait, yes?", "going to think", "yesterday",
+])
+def test_declined_or_unrelated_replies(reply):
+    assert not _is_confirmation(reply)
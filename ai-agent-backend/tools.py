@@ -1,12 +1,25 @@
 from typing import Dict, Any, List, Optional
 import httpx
+from http_client import api_http_client
 import json
 import datetime
 import asyncio
+import logging
 from decimal import Decimal
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from validators import validate_near_address, validate_evm_address, get_chain_from_address
-from knowledge_base import get_available_tokens_from_api, get_token_by_symbol, get_token_symbols_list
+from validators import validate_near_address, validate_evm_address, get_chain_from_address, EVM_ADDRESS_RE
+import knowledge_base
+from knowledge_base import get_available_tokens_from_api, get_token_by_symbol, get_token_by_contract, get_token_symbols_list, NEAR_CHAINS
+
+try:
+    # orjson (de)serializes quote and balance payloads several times faster than json
+    from orjson import loads as _json_loads, dumps as _json_dumps
+except ImportError:
+    from json import loads as _json_loads, dumps as _json_dumps
+
+logger = logging.getLogger(__name__)
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
 
 # EVM Chain IDs (from HOT Kit Network enum   ALL supported EVM chains)
 EVM_CHAIN_IDS = {
@@ -89,10 +102,10 @@ NON_EVM_CHAINS = {
 }
 
 # All chains   lookup helper
-ALL_SUPPORTED_CHAINS = set(list(EVM_CHAIN_IDS.keys()) + list(NON_EVM_CHAINS.keys()))
+ALL_SUPPORTED_CHAINS = frozenset(EVM_CHAIN_IDS) | frozenset(NON_EVM_CHAINS)
 
 # Chains that are EVM-based (same wallet type)
-EVM_CHAINS = set(EVM_CHAIN_IDS.keys())
+EVM_CHAINS = frozenset(EVM_CHAIN_IDS)
 
 def is_evm_chain(chain: str) -> bool:
     """Check if a chain name is EVM-based."""
@@ -113,20 +126,21 @@ def get_available_tokens() -> List[str]:
     Returns empty list if API fails.
     """
     try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            # If already in event loop, use the cached version
-            from knowledge_base import _token_cache
-            tokens = _token_cache if _token_cache else []
-        else:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop running in this thread: fetch (or refresh) the list
             try:
-                tokens = loop.run_until_complete(get_available_tokens_from_api())
+                tokens = asyncio.run(get_available_tokens_from_api())
             except Exception as e:
-                print(f"[TOOL] Failed to get tokens: {e}")
+                logger.error("[TOOL] Failed to get tokens: %s", e)
                 return []
+        else:
+            # Inside the event loop: use the cached version
+            tokens = knowledge_base._token_cache or []
         return get_token_symbols_list(tokens) if tokens else []
     except Exception as e:
-        print(f"[TOOL] Error in get_available_tokens: {e}")
+        logger.error("[TOOL] Error in get_available_tokens: %s", e)
         return []
 
 
@@ -136,13 +150,11 @@ def is_cross_chain_swap(token_in: str, token_out: str) -> bool:
     Uses cached token metadata to avoid async issues.
     """
     try:
-        from knowledge_base import _token_cache, get_token_by_symbol
-        
         # Use cached tokens only to avoid event loop issues
-        tokens = _token_cache if _token_cache else []
+        tokens = knowledge_base._token_cache or []
         
         if not tokens:
-            print(f"[TOOLS] Warning: No cached token data for cross-chain detection")
+            logger.warning("[TOOLS] Warning: No cached token data for cross-chain detection")
             return False
         
         # Find both tokens
@@ -150,7 +162,7 @@ def is_cross_chain_swap(token_in: str, token_out: str) -> bool:
         token_out_data = get_token_by_symbol(token_out.upper(), tokens)
         
         if not token_in_data or not token_out_data:
-            print(f"[TOOLS] Warning: Could not find token data for {token_in} or {token_out}")
+            logger.warning("[TOOLS] Warning: Could not find token data for %s or %s", token_in, token_out)
             return False
         
         # Get blockchain for each token
@@ -158,20 +170,18 @@ def is_cross_chain_swap(token_in: str, token_out: str) -> bool:
         chain_out = token_out_data.get("blockchain", "near").lower()
         
         # Normalize chain names (NEAR and Aurora are same chain)
-        if chain_in in ["near", "aurora"]:
+        if chain_in in NEAR_CHAINS:
             chain_in = "near"
-        if chain_out in ["near", "aurora"]:
+        if chain_out in NEAR_CHAINS:
             chain_out = "near"
         
         is_cross = chain_in != chain_out
-        print(f"[TOOLS] Cross-chain check: {token_in}({chain_in}) -> {token_out}({chain_out}) = {is_cross}")
+        logger.debug("[TOOLS] Cross-chain check: %s(%s) -> %s(%s) = %s", token_in, chain_in, token_out, chain_out, is_cross)
         
         return is_cross
         
     except Exception as e:
-        print(f"[TOOLS] Error in cross-chain detection: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[TOOLS] Error in cross-chain detection: %s", e)
         return False
 
 
@@ -186,42 +196,53 @@ def _fetch_quote_with_retry(url: str, payload: Dict, attempt_num: int = 1) -> ht
     Internal function to fetch quote with retry logic.
     Decorated with tenacity retry for 5-8 attempts with exponential backoff.
     """
-    print(f"[TOOL] Fetching quote attempt {attempt_num}/8...")
-    response = httpx.post(url, json=payload, timeout=10.0)
+    logger.debug("[TOOL] Fetching quote attempt %s/8...", attempt_num)
+    response = httpx.post(url, content=_json_dumps(payload), headers=_JSON_HEADERS, timeout=10.0)
     if response.status_code >= 400:
-        print(f"[TOOL] API Error ({response.status_code}): {response.text}")
+        logger.error("[TOOL] API Error (%s): %s", response.status_code, response.text)
     response.raise_for_status()
     return response
 
-def get_swap_quote(
-    token_in: str, 
-    token_out: str, 
-    amount: float, 
-    chain_id: str = "near", 
-    recipient_id: str = None,
-    is_cross_chain: bool = False,
-    refund_address: str = None,
-    source_chain: str = None,
-    dest_chain: str = None
+
+@retry(
+    stop=stop_after_attempt(8),
+    wait=wait_exponential(multiplier=1, min=1, max=10),
+    retry=retry_if_exception_type((httpx.HTTPError, httpx.TimeoutException)),
+    reraise=True
+)
+async def _afetch_quote_with_retry(url: str, payload: Dict) -> httpx.Response:
+    """Async variant of _fetch_quote_with_retry   does not block the event loop."""
+    logger.debug("[TOOL] Fetching quote (async)...")
+    response = await api_http_client.post(url, content=_json_dumps(payload), headers=_JSON_HEADERS, timeout=10.0)
+    if response.status_code >= 400:
+        logger.error("[TOOL] API Error (%s): %s", response.status_code, response.text)
+    response.raise_for_status()
+    return response
+
+
+QUOTE_URL = "https://1click.chaindefuser.com/v0/quote"
+
+
+def _build_quote_request(
+    token_in: str,
+    token_out: str,
+    amount: float,
+    chain_id: str,
+    recipient_id: Optional[str],
+    is_cross_chain: bool,
+    refund_address: Optional[str],
+    source_chain: Optional[str],
+    dest_chain: Optional[str]
 ) -> Dict[str, Any]:
     """
-    Fetches a real swap quote from Defuse 1-Click API.
-    
-    Args:
-        token_in: Source token symbol
-        token_out: Destination token symbol
-        amount: Amount to swap
-        chain_id: Chain identifier
-        recipient_id: Recipient address (NEAR account for same-chain, destination chain address for cross-chain)
-        is_cross_chain: Whether this is a cross-chain swap
-        refund_address: Address for refunds (should be source chain address, e.g. NEAR account)
+    Resolve tokens and build the 1-Click quote payload.
+    Returns {"error": ...} or {"payload": ..., "token_out_data": ..., "asset_in": ..., "asset_out": ...}
     """
     t_in = token_in.upper()
     t_out = token_out.upper()
     
     # Dynamic lookup from knowledge base
-    from knowledge_base import _token_cache, get_token_by_symbol
-    tokens = _token_cache if _token_cache else []
+    tokens = knowledge_base._token_cache or []
     
     token_in_data = get_token_by_symbol(t_in, tokens, chain=source_chain or chain_id)
     token_out_data = get_token_by_symbol(t_out, tokens, chain=dest_chain)
@@ -237,14 +258,12 @@ def get_swap_quote(
     decimals_in = token_in_data.get("decimals", 24)
     amount_atomic = int(Decimal(str(amount)) * Decimal(10 ** decimals_in))
     
-    print(f"[TOOL] Fetching 1-Click quote for {amount} {t_in} -> {t_out}")
-    print(f"[TOOL]   Asset In:  {asset_in}")
-    print(f"[TOOL]   Asset Out: {asset_out}")
-    print(f"[TOOL]   Recipient: {recipient_id}")
-    print(f"[TOOL]   Cross-chain: {is_cross_chain}")
-    print(f"[TOOL]   Refund To: {refund_address}")
-
-    url = "https://1click.chaindefuser.com/v0/quote"
+    logger.info("[TOOL] Fetching 1-Click quote for %s %s -> %s", amount, t_in, t_out)
+    logger.debug("[TOOL]   Asset In:  %s", asset_in)
+    logger.debug("[TOOL]   Asset Out: %s", asset_out)
+    logger.debug("[TOOL]   Recipient: %s", recipient_id)
+    logger.debug("[TOOL]   Cross-chain: %s", is_cross_chain)
+    logger.debug("[TOOL]   Refund To: %s", refund_address)
     
     if not recipient_id:
         return {"error": "Wallet must be connected to fetch a quote (missing Account ID)"}
@@ -295,56 +314,142 @@ def get_swap_quote(
         "quoteWaitingTimeMs": 0
     }
     
-    print(f"[TOOL] Quote Request Payload: {json.dumps(payload, indent=2)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[TOOL] Quote Request Payload: %s", json.dumps(payload, indent=2))
+    
+    return {
+        "payload": payload,
+        "token_out_data": token_out_data,
+        "asset_in": asset_in,
+        "asset_out": asset_out
+    }
+
+
+def _parse_quote_response(
+    data: Dict[str, Any],
+    request: Dict[str, Any],
+    token_in: str,
+    token_out: str,
+    amount: float,
+    chain_id: str
+) -> Dict[str, Any]:
+    """Turn a raw 1-Click quote response into the quote dict returned to tools."""
+    t_in = token_in.upper()
+    t_out = token_out.upper()
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[TOOL] Quote Response: %s", json.dumps(data, indent=2))
+    
+    # Check for error in body
+    if "message" in data:
+         return {"error": data["message"]}
+         
+    quote = data.get("quote") or data
+    if not quote.get("depositAddress"):
+         return {"error": "No deposit address found in quote"}
+         
+    # Format output amount using dynamic decimals
+    amount_out_atomic = int(quote["amountOut"])
+    decimals_out = request["token_out_data"].get("decimals", 18)
+    amount_out_fmt = amount_out_atomic / (10 ** decimals_out)
+    
+    logger.info("[TOOL] Quote received: %s %s -> %s %s", amount, t_in, amount_out_fmt, t_out)
+    logger.debug("[TOOL] Deposit address: %s", quote['depositAddress'])
+    
+    return {
+        "token_in": t_in,
+        "token_out": t_out,
+        "amount_in": amount,
+        "amount_out": amount_out_fmt,
+        "rate": amount_out_fmt / amount if amount > 0 else 0,
+        "chain": chain_id,
+        "deposit_address": quote["depositAddress"],
+        "defuse_asset_in": request["asset_in"],
+        "defuse_asset_out": request["asset_out"]
+    }
+
+
+def get_swap_quote(
+    token_in: str, 
+    token_out: str, 
+    amount: float, 
+    chain_id: str = "near", 
+    recipient_id: str = None,
+    is_cross_chain: bool = False,
+    refund_address: str = None,
+    source_chain: str = None,
+    dest_chain: str = None
+) -> Dict[str, Any]:
+    """
+    Fetches a real swap quote from Defuse 1-Click API.
+    
+    Args:
+        token_in: Source token symbol
+        token_out: Destination token symbol
+        amount: Amount to swap
+        chain_id: Chain identifier
+        recipient_id: Recipient address (NEAR account for same-chain, destination chain address for cross-chain)
+        is_cross_chain: Whether this is a cross-chain swap
+        refund_address: Address for refunds (should be source chain address, e.g. NEAR account)
+    """
+    request = _build_quote_request(
+        token_in, token_out, amount, chain_id, recipient_id,
+        is_cross_chain, refund_address, source_chain, dest_chain
+    )
+    if "error" in request:
+        return request
     
     try:
         # Use retry logic - attempt up to 8 times
         for attempt in range(1, 9):
             try:
-                response = _fetch_quote_with_retry(url, payload, attempt)
+                response = _fetch_quote_with_retry(QUOTE_URL, request["payload"], attempt)
                 break
             except (httpx.HTTPError, httpx.TimeoutException) as e:
                 if attempt == 8:
-                    print(f"[TOOL] Failed to fetch quote after {attempt} attempts")
+                    logger.error("[TOOL] Failed to fetch quote after %s attempts", attempt)
                     return {"error": "Unable to fetch quote after multiple attempts. Please try again later."}
-                print(f"[TOOL] Attempt {attempt} failed, retrying... ({str(e)})")
+                logger.warning("[TOOL] Attempt %s failed, retrying... (%s)", attempt, str(e))
                 continue
-        data = response.json()
-        
-        print(f"[TOOL] Quote Response: {json.dumps(data, indent=2)}")
-        
-        # Check for error in body
-        if "message" in data:
-             return {"error": data["message"]}
-             
-        quote = data.get("quote") or data
-        if not quote.get("depositAddress"):
-             return {"error": "No deposit address found in quote"}
-             
-        # Format output amount using dynamic decimals
-        amount_out_atomic = int(quote["amountOut"])
-        decimals_out = token_out_data.get("decimals", 18)
-        amount_out_fmt = amount_out_atomic / (10 ** decimals_out)
+        return _parse_quote_response(_json_loads(response.content), request, token_in, token_out, amount, chain_id)
         
-        print(f"[TOOL] Quote received: {amount} {t_in} -> {amount_out_fmt} {t_out}")
-        print(f"[TOOL] Deposit address: {quote['depositAddress']}")
-        
-        return {
-            "token_in": t_in,
-            "token_out": t_out,
-            "amount_in": amount,
-            "amount_out": amount_out_fmt,
-            "rate": amount_out_fmt / amount if amount > 0 else 0,
-            "chain": chain_id,
-            "deposit_address": quote["depositAddress"],
-            "defuse_asset_in": asset_in,
-            "defuse_asset_out": asset_out
-        }
+    except Exception as e:
+        logger.exception("[TOOL] API Error: %s", e)
+        return {"error": str(e)}
+
+
+async def aget_swap_quote(
+    token_in: str, 
+    token_out: str, 
+    amount: float, 
+    chain_id: str = "near", 
+    recipient_id: str = None,
+    is_cross_chain: bool = False,
+    refund_address: str = None,
+    source_chain: str = None,
+    dest_chain: str = None
+) -> Dict[str, Any]:
+    """
+    Async version of get_swap_quote for use inside the agent's event loop.
+    Same arguments and return shape as get_swap_quote.
+    """
+    request = _build_quote_request(
+        token_in, token_out, amount, chain_id, recipient_id,
+        is_cross_chain, refund_address, source_chain, dest_chain
+    )
+    if "error" in request:
+        return request
+    
+    try:
+        try:
+            response = await _afetch_quote_with_retry(QUOTE_URL, request["payload"])
+        except (httpx.HTTPError, httpx.TimeoutException) as e:
+            logger.error("[TOOL] Failed to fetch quote after retries: %s", e)
+            return {"error": "Unable to fetch quote after multiple attempts. Please try again later."}
+        return _parse_quote_response(_json_loads(response.content), request, token_in, token_out, amount, chain_id)
         
     except Exception as e:
-        print(f"[TOOL] API Error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[TOOL] API Error: %s", e)
         return {"error": str(e)}
 
 def create_near_intent_transaction(
@@ -373,16 +478,15 @@ def create_near_intent_transaction(
         deposit_address: The deposit address from the 1-Click quote response
         account_id: User's NEAR account ID (used in ft_transfer_call msg)
     """
-    print(f"[TOOL] Creating transaction: {amount} {token_in} -> {token_out}")
-    print(f"[TOOL]   Deposit address: {deposit_address}")
-    print(f"[TOOL]   Account ID: {account_id}")
+    logger.info("[TOOL] Creating transaction: %s %s -> %s", amount, token_in, token_out)
+    logger.debug("[TOOL]   Deposit address: %s", deposit_address)
+    logger.debug("[TOOL]   Account ID: %s", account_id)
     
     contract_id = "intents.near" 
     transactions = []
     
     # Dynamic lookup
-    from knowledge_base import _token_cache, get_token_by_symbol
-    tokens = _token_cache if _token_cache else []
+    tokens = knowledge_base._token_cache or []
     
     token_in_data = get_token_by_symbol(token_in.upper(), tokens)
     token_out_data = get_token_by_symbol(token_out.upper(), tokens)
@@ -494,12 +598,12 @@ def create_near_intent_transaction(
         ]
     })
     
-    print(f"[TOOL] Transaction payload ({len(transactions)} txs):")
+    logger.debug("[TOOL] Transaction payload (%s txs):", len(transactions))
     for i, tx in enumerate(transactions):
-        print(f"[TOOL]   TX{i+1}: receiverId={tx['receiverId']}, actions={len(tx['actions'])}")
+        logger.debug("[TOOL]   TX%s: receiverId=%s, actions=%s", i+1, tx['receiverId'], len(tx['actions']))
         for j, action in enumerate(tx['actions']):
             if action.get('params'):
-                print(f"[TOOL]     Action{j+1}: {action['params'].get('methodName', 'unknown')}")
+                logger.debug("[TOOL]     Action%s: %s", j+1, action['params'].get('methodName', 'unknown'))
     
     return transactions
 
@@ -512,11 +616,14 @@ def create_near_intent_transaction(
 
 import re
 
+# Action types accepted in NEAR transaction payloads
+NEAR_ACTION_TYPES = frozenset({"FunctionCall", "Transfer"})
+
 def is_valid_evm_address(address: str) -> bool:
     """Check if a string is a valid EVM hex address (0x + 40 hex chars)."""
     if not address or not isinstance(address, str):
         return False
-    return bool(re.match(r'^0x[0-9a-fA-F]{40}$', address))
+    return EVM_ADDRESS_RE.fullmatch(address) is not None
 
 
 def validate_evm_transaction(tx_payload: Dict[str, Any], deposit_address: str, amount: float, token_in: str) -> Dict[str, Any]:
@@ -602,14 +709,14 @@ def validate_evm_transaction(tx_payload: Dict[str, Any], deposit_address: str, a
     }
     
     if errors:
-        print(f"[SAFETY]   EVM TX VALIDATION FAILED for {amount} {token_in}:")
+        logger.error("[SAFETY]   EVM TX VALIDATION FAILED for %s %s:", amount, token_in)
         for e in errors:
-            print(f"[SAFETY]   ERROR: {e}")
+            logger.error("[SAFETY]   ERROR: %s", e)
     if warnings:
         for w in warnings:
-            print(f"[SAFETY]     WARNING: {w}")
+            logger.warning("[SAFETY]     WARNING: %s", w)
     if not errors:
-        print(f"[SAFETY]   EVM TX validated: {amount} {token_in} -> {to_addr[:10]}...")
+        logger.info("[SAFETY]   EVM TX validated: %s %s -> %s...", amount, token_in, to_addr[:10])
     
     return result
 
@@ -676,7 +783,7 @@ def validate_near_transaction(tx_payload: Any, deposit_address: str, amount: flo
                                     f"{action_prefix}: ft_transfer_call receiver '{receiver_id}'   "
                                     f"verify this is the correct intents contract"
                                 )
-            elif action_type not in ["FunctionCall", "Transfer"]:
+            elif action_type not in NEAR_ACTION_TYPES:
                 warnings.append(f"{action_prefix}: Unusual action type: '{action_type}'")
     
     # 4. Amount sanity
@@ -690,14 +797,14 @@ def validate_near_transaction(tx_payload: Any, deposit_address: str, amount: flo
     }
     
     if errors:
-        print(f"[SAFETY]   NEAR TX VALIDATION FAILED for {amount} {token_in}:")
+        logger.error("[SAFETY]   NEAR TX VALIDATION FAILED for %s %s:", amount, token_in)
         for e in errors:
-            print(f"[SAFETY]   ERROR: {e}")
+            logger.error("[SAFETY]   ERROR: %s", e)
     if warnings:
         for w in warnings:
-            print(f"[SAFETY]     WARNING: {w}")
+            logger.warning("[SAFETY]     WARNING: %s", w)
     if not errors:
-        print(f"[SAFETY]   NEAR TX validated: {amount} {token_in}, {len(tx_payload)} txs")
+        logger.info("[SAFETY]   NEAR TX validated: %s %s, %s txs", amount, token_in, len(tx_payload))
     
     return result
 
@@ -716,9 +823,9 @@ def validate_generic_transaction(tx_payload: Dict[str, Any], amount: float, toke
     
     result = {"valid": len(errors) == 0, "errors": errors, "warnings": warnings}
     if errors:
-        print(f"[SAFETY]   Generic TX VALIDATION FAILED: {errors}")
+        logger.error("[SAFETY]   Generic TX VALIDATION FAILED: %s", errors)
     else:
-        print(f"[SAFETY]   Generic TX validated: {amount} {token_in} on {tx_payload.get('chain')}")
+        logger.info("[SAFETY]   Generic TX validated: %s %s on %s", amount, token_in, tx_payload.get('chain'))
     return result
 
 
@@ -800,7 +907,7 @@ def create_deposit_transaction(
         
     else:
         # Fallback for non-EVM and non-NEAR (Solana, Cosmos, Tron etc.)
-        print(f"[TOOL] Creating Generic/Native transfer for {token_in} on {source_chain}")
+        logger.debug("[TOOL] Creating Generic/Native transfer for %s on %s", token_in, source_chain)
         tx_payload = {
             "chain": source_chain,
             "type": "native_transfer",
@@ -835,12 +942,11 @@ def create_evm_deposit_transaction(
     # If it's a NEAR account ID or other non-EVM format, omit it   
     # the frontend wallet-provider will fill it from the connected wallet
     if from_address and not from_address.startswith("0x"):
-        print(f"[TOOL] WARNING: from_address '{from_address}' is not a valid EVM address, omitting")
+        logger.warning("[TOOL] WARNING: from_address '%s' is not a valid EVM address, omitting", from_address)
         from_address = ""
     
     # Get token data to check if Native or ERC-20
-    from knowledge_base import _token_cache, get_token_by_symbol
-    tokens = _token_cache if _token_cache else []
+    tokens = knowledge_base._token_cache or []
     token_data = get_token_by_symbol(token_in.upper(), tokens, chain=source_chain)
     
     # Default to 18 decimals if not found
@@ -861,8 +967,8 @@ def create_evm_deposit_transaction(
     
     if is_erc20:
         # ERC-20 Transfer
-        print(f"[TOOL] Creating ERC-20 transfer for {token_in} on {source_chain}")
-        print(f"[TOOL] Contract: {contract_address}, To: {deposit_address}, Amount: {amount_wei}")
+        logger.debug("[TOOL] Creating ERC-20 transfer for %s on %s", token_in, source_chain)
+        logger.debug("[TOOL] Contract: %s, To: %s, Amount: %s", contract_address, deposit_address, amount_wei)
         
         data_payload = encode_erc20_transfer(deposit_address, amount_wei)
         
@@ -876,7 +982,7 @@ def create_evm_deposit_transaction(
             tx_payload["from"] = from_address
     else:
         # Native Asset Transfer (ETH, BNB, etc.)
-        print(f"[TOOL] Creating Native transfer for {token_in} on {source_chain}")
+        logger.debug("[TOOL] Creating Native transfer for %s on %s", token_in, source_chain)
         tx_payload = {
             "chainId": chain_id,
             "to": deposit_address,  # Send directly to deposit address
@@ -885,11 +991,11 @@ def create_evm_deposit_transaction(
         if from_address:
             tx_payload["from"] = from_address
     
-    print(f"[TOOL] EVM Transaction payload:")
-    print(f"[TOOL]   Chain: {source_chain} (ID: {chain_id})")
-    print(f"[TOOL]   From: {from_address}")
-    print(f"[TOOL]   To: {deposit_address}")
-    print(f"[TOOL]   Value: {amount_wei} ({amount} {token_in})")
+    logger.debug("[TOOL] EVM Transaction payload:")
+    logger.debug("[TOOL]   Chain: %s (ID: %s)", source_chain, chain_id)
+    logger.debug("[TOOL]   From: %s", from_address)
+    logger.debug("[TOOL]   To: %s", deposit_address)
+    logger.debug("[TOOL]   Value: %s (%s %s)", amount_wei, amount, token_in)
     
     return tx_payload
 
@@ -939,16 +1045,16 @@ async def submit_deposit_tx(
     if near_sender_account:
         payload["nearSenderAccount"] = near_sender_account
     
-    print(f"[TOOL] Submitting deposit tx to 1-Click: hash={tx_hash}, addr={deposit_address}")
+    logger.debug("[TOOL] Submitting deposit tx to 1-Click: hash=%s, addr=%s", tx_hash, deposit_address)
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, timeout=10.0)
-            data = response.json()
-            print(f"[TOOL] Deposit submit response: {json.dumps(data, indent=2)}")
-            return data
+        response = await api_http_client.post(url, content=_json_dumps(payload), headers=_JSON_HEADERS, timeout=10.0)
+        data = _json_loads(response.content)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[TOOL] Deposit submit response: %s", json.dumps(data, indent=2))
+        return data
     except Exception as e:
-        print(f"[TOOL] Deposit submit error (non-critical): {e}")
+        logger.warning("[TOOL] Deposit submit error (non-critical): %s", e)
         # This is optional   don't fail the swap if this call fails
         return {"error": str(e)}
 
@@ -963,51 +1069,39 @@ async def get_wallet_portfolio(wallet_address: str, chain: str = "near") -> dict
         return portfolio
         
     try:
-        import httpx
-        from knowledge_base import _token_cache
-        tokens = _token_cache if _token_cache else []
+        # 1. Fetch native NEAR balance
+        rpc_url = "https://rpc.mainnet.near.org"
+        resp = await api_http_client.post(rpc_url, json={
+            "jsonrpc": "2.0", "id": "1", "method": "query",
+            "params": {"request_type": "view_account", "finality": "final", "account_id": wallet_address}
+        }, timeout=10.0)
         
-        async with httpx.AsyncClient() as client:
-            # 1. Fetch native NEAR balance
-            rpc_url = "https://rpc.mainnet.near.org"
-            resp = await client.post(rpc_url, json={
-                "jsonrpc": "2.0", "id": "1", "method": "query",
-                "params": {"request_type": "view_account", "finality": "final", "account_id": wallet_address}
-            }, timeout=10.0)
-            
-            if resp.status_code == 200:
-                result = resp.json().get("result", {})
-                if "amount" in result:
-                    # Subtract ~0.05 NEAR for storage to get liquid balance
-                    available = max(0, int(result["amount"]) - 50000000000000000000000)
-                    if available > 0:
-                        portfolio["near"] = available / 1e24
-            else:
-                print(f"[TOOL-DEBUG] NEAR RPC failed for {wallet_address}: {resp.status_code} {resp.text}")
-            
-            # 2. Fetch NEP-141 tokens via FastNEAR
-            fn_resp = await client.get(f"https://api.fastnear.com/v1/account/{wallet_address}/ft", timeout=10.0)
-            if fn_resp.status_code == 200:
-                data = fn_resp.json()
-                for token_data in data.get("tokens", []):
-                    contract = token_data.get("contract_id", "")
-                    bal_str = token_data.get("balance", "0")
-                    if not bal_str or int(bal_str) == 0:
-                        continue
-                        
-                    # Match contract to our supported token list to get decimals & symbol
-                    matched_symbol = None
-                    decimals = 18
-                    for t in tokens:
-                        if t.get("contractAddress", "").lower() == contract.lower() or t.get("defuseAssetId", "").endswith(contract):
-                            matched_symbol = t.get("symbol", "").lower()
-                            decimals = t.get("decimals", 18)
-                            break
-                    
-                    if matched_symbol:
-                        portfolio[matched_symbol] = int(bal_str) / (10 ** decimals)
+        if resp.status_code == 200:
+            result = _json_loads(resp.content).get("result", {})
+            if "amount" in result:
+                # Subtract ~0.05 NEAR for storage to get liquid balance
+                available = max(0, int(result["amount"]) - 50000000000000000000000)
+                if available > 0:
+                    portfolio["near"] = available / 1e24
+        else:
+            logger.warning("[TOOL-DEBUG] NEAR RPC failed for %s: %s %s", wallet_address, resp.status_code, resp.text)
+        
+        # 2. Fetch NEP-141 tokens via FastNEAR
+        fn_resp = await api_http_client.get(f"https://api.fastnear.com/v1/account/{wallet_address}/ft", timeout=10.0)
+        if fn_resp.status_code == 200:
+            data = _json_loads(fn_resp.content)
+            for token_data in data.get("tokens", []):
+                contract = token_data.get("contract_id", "")
+                bal_str = token_data.get("balance", "0")
+                if not bal_str or int(bal_str) == 0:
+                    continue
                     
+                # Match contract to our supported token list to get decimals & symbol
+                token = get_token_by_contract(contract)
+                if token:
+                    portfolio[token["symbol"].lower()] = int(bal_str) / (10 ** token.get("decimals", 18))
+                
     except Exception as e:
-        print(f"[TOOL] Error fetching portfolio for {wallet_address}: {e}")
+        logger.error("[TOOL] Error fetching portfolio for %s: %s", wallet_address, e)
         
     return portfolio
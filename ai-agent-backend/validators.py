@@ -4,7 +4,20 @@ Supports: NEAR, EVM, Solana, Tron, TON
 """
 from typing import Dict, Optional, List, Tuple
 import re
-from fuzzywuzzy import fuzz, process
+
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process as _fuzzy_processor
+
+
+# Precompiled address patterns (used on every quote with an explicit destination)
+NEAR_IMPLICIT_RE = re.compile(r'[a-f0-9]{64}')
+NEAR_NAMED_RE = re.compile(r'[a-z0-9_-]{2,}(\.[a-z0-9_-]{2,})*\.?(near|testnet)')
+NEAR_SUBACCOUNT_RE = re.compile(r'[a-z0-9_-]{2,}(\.[a-z0-9_-]{2,})+')
+EVM_ADDRESS_RE = re.compile(r'0x[a-fA-F0-9]{40}')
+SOLANA_ADDRESS_RE = re.compile(r'[1-9A-HJ-NP-Za-km-z]{32,44}')
+TRON_ADDRESS_RE = re.compile(r'T[1-9A-HJ-NP-Za-km-z]{33}')
+TON_RAW_RE = re.compile(r'-?[0-9]+:[a-fA-F0-9]{64}')
+TON_FRIENDLY_RE = re.compile(r'(EQ|UQ)[A-Za-z0-9_-]{46,48}')
 
 
 def validate_near_address(address: str) -> bool:
@@ -18,18 +31,18 @@ def validate_near_address(address: str) -> bool:
     if not address or not isinstance(address, str):
         return False
     
-    address = address.strip()
+    address = address.strip().lower()
     
     # Check for implicit account (64 hex chars)
-    if re.match(r'^[a-f0-9]{64}$', address.lower()):
+    if NEAR_IMPLICIT_RE.fullmatch(address):
         return True
     
     # Check for named account
-    if re.match(r'^[a-z0-9_-]{2,}(\.[a-z0-9_-]{2,})*\.?(near|testnet)$', address.lower()):
+    if NEAR_NAMED_RE.fullmatch(address):
         return True
     
     # Check for valid subaccount pattern without TLD
-    if re.match(r'^[a-z0-9_-]{2,}(\.[a-z0-9_-]{2,})+$', address.lower()):
+    if NEAR_SUBACCOUNT_RE.fullmatch(address):
         return True
     
     return False
@@ -46,7 +59,7 @@ def validate_evm_address(address: str) -> bool:
     address = address.strip()
     
     # Basic format check: 0x followed by 40 hex characters
-    if not re.match(r'^0x[a-fA-F0-9]{40}$', address):
+    if not EVM_ADDRESS_RE.fullmatch(address):
         return False
     
     try:
@@ -67,7 +80,7 @@ def validate_solana_address(address: str) -> bool:
     address = address.strip()
     
     # Solana addresses: base58 chars (no 0, O, I, l), typically 32-44 chars
-    if not re.match(r'^[1-9A-HJ-NP-Za-km-z]{32,44}$', address):
+    if not SOLANA_ADDRESS_RE.fullmatch(address):
         return False
     
     return True
@@ -84,7 +97,7 @@ def validate_tron_address(address: str) -> bool:
     address = address.strip()
     
     # Tron address: starts with T, 34 chars, base58
-    if not re.match(r'^T[1-9A-HJ-NP-Za-km-z]{33}$', address):
+    if not TRON_ADDRESS_RE.fullmatch(address):
         return False
     
     return True
@@ -103,16 +116,39 @@ def validate_ton_address(address: str) -> bool:
     address = address.strip()
     
     # Raw format: 0:64hex or -1:64hex
-    if re.match(r'^-?[0-9]+:[a-fA-F0-9]{64}$', address):
+    if TON_RAW_RE.fullmatch(address):
         return True
     
     # User-friendly format: EQ or UQ prefix, base64url, ~48 chars
-    if re.match(r'^(EQ|UQ)[A-Za-z0-9_-]{46,48}$', address):
+    if TON_FRIENDLY_RE.fullmatch(address):
         return True
     
     return False
 
 
+# Map chain names to validators
+CHAIN_VALIDATORS = {
+    'near': validate_near_address,
+    'aurora': validate_near_address,  # Aurora uses NEAR addresses
+    'eth': validate_evm_address,
+    'ethereum': validate_evm_address,
+    'arb': validate_evm_address,
+    'arbitrum': validate_evm_address,
+    'base': validate_evm_address,
+    'op': validate_evm_address,
+    'optimism': validate_evm_address,
+    'bsc': validate_evm_address,
+    'gnosis': validate_evm_address,
+    'polygon': validate_evm_address,
+    'avalanche': validate_evm_address,
+    'solana': validate_solana_address,
+    'sol': validate_solana_address,
+    'tron': validate_tron_address,
+    'trx': validate_tron_address,
+    'ton': validate_ton_address,
+}
+
+
 def validate_address_for_chain(address: str, chain: str) -> bool:
     """
     Validate a wallet address for a specific blockchain.
@@ -126,29 +162,7 @@ def validate_address_for_chain(address: str, chain: str) -> bool:
     """
     chain_lower = chain.lower().strip()
     
-    # Map chain names to validators
-    chain_validators = {
-        'near': validate_near_address,
-        'aurora': validate_near_address,  # Aurora uses NEAR addresses
-        'eth': validate_evm_address,
-        'ethereum': validate_evm_address,
-        'arb': validate_evm_address,
-        'arbitrum': validate_evm_address,
-        'base': validate_evm_address,
-        'op': validate_evm_address,
-        'optimism': validate_evm_address,
-        'bsc': validate_evm_address,
-        'gnosis': validate_evm_address,
-        'polygon': validate_evm_address,
-        'avalanche': validate_evm_address,
-        'solana': validate_solana_address,
-        'sol': validate_solana_address,
-        'tron': validate_tron_address,
-        'trx': validate_tron_address,
-        'ton': validate_ton_address,
-    }
-    
-    validator = chain_validators.get(chain_lower)
+    validator = CHAIN_VALIDATORS.get(chain_lower)
     if validator:
         return validator(address)
     
@@ -176,24 +190,26 @@ def get_chain_from_address(address: str) -> Optional[str]:
     return None
 
 
+CHAIN_ADDRESS_FORMATS = {
+    'near': 'NEAR address (e.g., alice.near or 64-char hex)',
+    'eth': 'EVM address starting with 0x (42 characters)',
+    'ethereum': 'EVM address starting with 0x (42 characters)',
+    'arb': 'EVM address starting with 0x (42 characters)',
+    'base': 'EVM address starting with 0x (42 characters)',
+    'solana': 'Solana address (32-44 base58 characters)',
+    'sol': 'Solana address (32-44 base58 characters)',
+    'tron': 'Tron address starting with T (34 characters)',
+    'trx': 'Tron address starting with T (34 characters)',
+    'ton': 'TON address (EQ/UQ prefix or raw format)',
+}
+
+
 def get_chain_address_format(chain: str) -> str:
     """
     Get a human-readable description of the expected address format for a chain.
     Useful for error messages when address validation fails.
     """
-    formats = {
-        'near': 'NEAR address (e.g., alice.near or 64-char hex)',
-        'eth': 'EVM address starting with 0x (42 characters)',
-        'ethereum': 'EVM address starting with 0x (42 characters)',
-        'arb': 'EVM address starting with 0x (42 characters)',
-        'base': 'EVM address starting with 0x (42 characters)',
-        'solana': 'Solana address (32-44 base58 characters)',
-        'sol': 'Solana address (32-44 base58 characters)',
-        'tron': 'Tron address starting with T (34 characters)',
-        'trx': 'Tron address starting with T (34 characters)',
-        'ton': 'TON address (EQ/UQ prefix or raw format)',
-    }
-    return formats.get(chain.lower(), f'{chain} wallet address')
+    return CHAIN_ADDRESS_FORMATS.get(chain.lower(), f'{chain} wallet address')
 
 
 #   Token Matching  
@@ -227,7 +243,10 @@ def fuzzy_match_token(
         }
     
     # Use fuzzy matching to find best match
-    matches = process.extract(input_upper, available_upper, scorer=fuzz.ratio, limit=3)
+    # (rapidfuzz yields (choice, score, index) triples)
+    matches = process.extract(
+        input_upper, available_upper, scorer=fuzz.ratio, processor=_fuzzy_processor, limit=3
+    )
     
     if not matches or matches[0][1] < threshold:
         return {
@@ -237,7 +256,7 @@ def fuzzy_match_token(
             'alternatives': [m[0] for m in matches if m[1] >= 50]
         }
     
-    best_match, confidence = matches[0]
+    best_match, confidence = matches[0][0], round(matches[0][1])
     alternatives = [m[0] for m in matches[1:] if m[1] >= 50]
     
     return {
@@ -35,28 +35,30 @@ knowledge_base._token_cache = [
     }
 ]
 
+knowledge_base._build_token_index(knowledge_base._token_cache)
+
 from agent_tools import get_swap_quote_tool
 
-# Mock the actual _get_swap_quote function in tools.py to avoid calling real API
+# Mock the actual _aget_swap_quote function used by the tool to avoid calling real API
 # But we DO want to call the real tool logic up to the API call.
-# The tool calls `tools.get_swap_quote`.
-import tools
-original_get_swap_quote = tools.get_swap_quote
+# The tool calls `agent_tools._aget_swap_quote` (tools.aget_swap_quote).
+import agent_tools
+original_get_swap_quote = agent_tools._aget_swap_quote
 
-def mock_get_swap_quote(*args, **kwargs):
-    print("\n[MOCK] tools.get_swap_quote called with:")
+async def mock_get_swap_quote(*args, **kwargs):
+    print("\n[MOCK] tools.aget_swap_quote called with:")
     # print all args and kwargs
     for k, v in kwargs.items():
         print(f"  {k}: {v}")
-    return "MOCK_QUOTE_RESULT"
+    return {"error": "MOCK_QUOTE_RESULT"}
 
-tools.get_swap_quote = mock_get_swap_quote
+agent_tools._aget_swap_quote = mock_get_swap_quote
 
 def test_tool(scenario_name, **kwargs):
     print(f"\n--- Testing Scenario: {scenario_name} ---")
     try:
-        # StructuredTool.invoke takes a dict
-        result = get_swap_quote_tool.invoke(kwargs)
+        # StructuredTool.ainvoke takes a dict (the tool is async)
+        result = asyncio.run(get_swap_quote_tool.ainvoke(kwargs))
         print(f"Result: {result}")
     except Exception as e:
         print(f"Error: {e}")